@@ -0,0 +1,79 @@
+"""
+Recall@k / latency benchmark for the approximate search backends.
+
+Compares each IVF n_probe setting against the exact scan on a synthetic,
+clustered embedding matrix (no model download needed):
+
+    python benchmarks/ann_recall.py --n 200000 --dim 384 --queries 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from search_backends import ExactSearch, IVFSearch, normalize
+
+
+def make_corpus(n, dim, n_topics, seed):
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    labels = rng.integers(n_topics, size=n)
+    noise = rng.standard_normal((n, dim)).astype(np.float32) * 0.5
+    return normalize(topics[labels] + noise)
+
+
+def time_queries(backend, queries, top_k):
+    ids = []
+    start = time.perf_counter()
+    for q in queries:
+        idx, _ = backend.search(q, top_k)
+        ids.append(idx)
+    elapsed = time.perf_counter() - start
+    return ids, elapsed / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.n, args.dim, n_topics=max(16, args.n // 500), seed=args.seed)
+    queries = make_corpus(args.queries, args.dim, n_topics=max(16, args.n // 500), seed=args.seed + 1)
+
+    exact = ExactSearch()
+    exact.build(corpus)
+    truth, exact_ms = time_queries(exact, queries, args.top_k)
+
+    print(f"corpus={args.n}x{args.dim} queries={args.queries} k={args.top_k}")
+    print(f"{'backend':<22}{'recall@k':>10}{'ms/query':>12}")
+    print(f"{'exact':<22}{1.0:>10.3f}{exact_ms:>12.2f}")
+
+    ivf = IVFSearch(n_lists=args.n_lists)
+    start = time.perf_counter()
+    ivf.build(corpus)
+    build_s = time.perf_counter() - start
+
+    for n_probe in args.n_probe:
+        ivf.n_probe = n_probe
+        found, ivf_ms = time_queries(ivf, queries, args.top_k)
+
+        hits = sum(len(set(t.tolist()) & set(f.tolist())) for t, f in zip(truth, found))
+        recall = hits / (len(truth) * args.top_k)
+
+        print(f"{f'ivf n_probe={n_probe}':<22}{recall:>10.3f}{ivf_ms:>12.2f}")
+
+    print(f"ivf build: {build_s:.2f}s ({len(ivf.centroids)} lists)")
+
+
+if __name__ == "__main__":
+    main()
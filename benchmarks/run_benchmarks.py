@@ -0,0 +1,192 @@
+"""
+End-to-end stage benchmarks on synthetic long documents.
+
+For each input size, times every pipeline stage and records its peak
+traced memory, then writes the results as JSON. Passing --baseline flags
+stages that got slower than a previous results file.
+
+    python benchmarks/run_benchmarks.py --sizes 10KB 1MB 10MB
+    python benchmarks/run_benchmarks.py --sizes 1MB --baseline benchmarks/results/last.json
+
+Embedding uses a deterministic hashing stub unless --real-model is given,
+so the suite runs offline.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "doc_compressor"))
+sys.path.append(os.path.join(ROOT, "src"))
+
+from cleaner import clean_text, iter_clean_text
+from chunker import chunk_text, iter_chunk_text
+from compressor import compress_chunks
+from loss_estimator import estimate_loss
+from qa_engine import answer_question
+from chunking import chunk_documents
+
+from synthetic import generate_document, write_corpus_json
+from stub_model import HashingEmbedder
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+QUESTIONS = [
+    "What does the regulation say about security of processing?",
+    "When may personal data be transferred to a third country?",
+    "Which safeguards apply to risk assessment?",
+]
+
+UNITS = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+
+def parse_size(text):
+    text = text.upper().strip()
+    for unit, factor in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+class StageRecorder:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def run(self, name, fn, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        peak = None
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.stages[name] = {"seconds": round(seconds, 6), "peak_bytes": peak}
+        print(f"    {name:<28}{seconds:>10.3f}s" + (f"{peak / 2**20:>10.1f} MB" if peak is not None else ""))
+        return result
+
+
+def bench_size(size_bytes, seed, model, trace_memory, max_embed_chunks):
+    rec = StageRecorder(trace_memory)
+
+    raw = generate_document(size_bytes, seed)
+
+    # ---------- doc_compressor pipeline ----------
+    cleaned = rec.run("clean_text", clean_text, raw)
+    chunks = rec.run("chunk_text", chunk_text, cleaned, chunk_size=300, overlap=50)
+    rec.run("clean_chunk_stream", lambda: list(iter_chunk_text(
+        iter_clean_text(raw[i:i + (1 << 20)] for i in range(0, len(raw), 1 << 20)),
+        chunk_size=300, overlap=50,
+    )))
+    compressed = rec.run("compress_chunks", compress_chunks, chunks)
+    rec.run("estimate_loss", estimate_loss, raw, compressed)
+
+    summaries = [s["summary"] for s in compressed["section_summaries"]]
+    rec.run("answer_question", lambda: [answer_question(q, summaries) for q in QUESTIONS])
+
+    # ---------- src retrieval pipeline ----------
+    from vector_store import VectorStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_path = os.path.join(tmp, "corpus.json")
+        n_docs = max(1, size_bytes // (256 << 10))
+        write_corpus_json(corpus_path, n_docs, max(1, size_bytes // n_docs), seed)
+        doc_chunks = rec.run("chunk_documents", chunk_documents, corpus_path)
+
+    if max_embed_chunks:
+        doc_chunks = doc_chunks[:max_embed_chunks]
+
+    store = VectorStore(model=model)
+    rec.run("VectorStore.build_index", store.build_index, doc_chunks)
+    rec.run("VectorStore.search", lambda: [store.search(q, top_k=5) for q in QUESTIONS])
+
+    return {
+        "size_bytes": size_bytes,
+        "chunks": len(chunks),
+        "retrieval_chunks": len(doc_chunks),
+        "stages": rec.stages,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    previous = {r["size_bytes"]: r for r in baseline["runs"]}
+    regressions = []
+
+    for run in results["runs"]:
+        old = previous.get(run["size_bytes"])
+        if not old:
+            continue
+        for stage, now in run["stages"].items():
+            before = old["stages"].get(stage)
+            if before and before["seconds"] > 0 and now["seconds"] > before["seconds"] * (1 + tolerance):
+                regressions.append({
+                    "size_bytes": run["size_bytes"],
+                    "stage": stage,
+                    "before_seconds": before["seconds"],
+                    "after_seconds": now["seconds"],
+                })
+
+    for r in regressions:
+        print(f"[REGRESSION] {r['stage']} @ {r['size_bytes']} B: "
+              f"{r['before_seconds']:.3f}s -> {r['after_seconds']:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["10KB", "1MB", "10MB"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows stages down)")
+    parser.add_argument("--max-embed-chunks", type=int, default=None, help="Cap chunks sent to build_index")
+    parser.add_argument("--real-model", action="store_true", help="Use SentenceTransformer instead of the stub")
+    args = parser.parse_args()
+
+    model = None if args.real_model else HashingEmbedder()
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "model": "all-MiniLM-L6-v2" if args.real_model else "hashing-stub",
+        "runs": [],
+    }
+
+    for size in args.sizes:
+        size_bytes = parse_size(size)
+        print(f"[{size}] {size_bytes} bytes")
+        results["runs"].append(
+            bench_size(size_bytes, args.seed, model, not args.no_memory, args.max_embed_chunks)
+        )
+
+    if args.baseline:
+        results["regressions"] = compare(results, args.baseline, args.tolerance)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import hashlib
+import re
+
+import numpy as np
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline stand-in for SentenceTransformer.
+
+    Hashes each word into one of `dim` buckets (signed feature hashing), so
+    texts sharing words get similar vectors. Exposes the subset of the
+    SentenceTransformer API that VectorStore uses.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self._buckets = {}
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, show_progress_bar=False, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                bucket, sign = self._bucket(word)
+                out[row, bucket] += sign
+
+        return out[0] if single else out
+
+    def _bucket(self, word):
+        cached = self._buckets.get(word)
+        if cached is None:
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            cached = (int.from_bytes(digest[:4], "little") % self.dim, 1.0 if digest[4] & 1 else -1.0)
+            self._buckets[word] = cached
+        return cached
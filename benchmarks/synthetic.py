@@ -0,0 +1,77 @@
+"""
+Seeded synthetic long-document generator.
+
+Produces legal-flavoured ASCII prose (sentences, paragraphs, article
+headings, occasional risk/security/personal-data terms) so the signal
+matcher and QA engine have something to find. Output is deterministic for a
+given (size, seed) and is written in blocks, so 1 GB files never need to be
+held in memory.
+"""
+import json
+import random
+
+COMMON_WORDS = (
+    "the controller processor shall may must data subject processing purpose "
+    "authority member state union regulation article paragraph measure consent "
+    "right obligation information request period law lawful basis transfer third "
+    "country recipient record notification assessment organisation public interest "
+    "necessary appropriate including where such any other with without accordance"
+).split()
+
+SIGNAL_PHRASES = ["risk", "security", "personal data", "safeguards", "breach"]
+
+BLOCK_CHARS = 1 << 16
+
+
+def iter_blocks(size_bytes, seed=42):
+    """Yields text blocks whose total length is exactly size_bytes."""
+    rng = random.Random(seed)
+    remaining = size_bytes
+    article = 1
+
+    while remaining > 0:
+        parts = []
+        length = 0
+        while length < BLOCK_CHARS:
+            paragraph = _paragraph(rng, article)
+            article += 1
+            parts.append(paragraph)
+            length += len(paragraph)
+
+        block = "".join(parts)[:remaining]
+        remaining -= len(block)
+        yield block
+
+
+def generate_document(size_bytes, seed=42):
+    return "".join(iter_blocks(size_bytes, seed))
+
+
+def write_document(path, size_bytes, seed=42):
+    with open(path, "w", encoding="ascii") as f:
+        for block in iter_blocks(size_bytes, seed):
+            f.write(block)
+    return path
+
+
+def write_corpus_json(path, n_docs, doc_bytes, seed=42):
+    """Writes a raw_cleaned.json-style array of {"doc_id", "title", "text"}."""
+    with open(path, "w", encoding="ascii") as f:
+        f.write("[\n")
+        for i in range(n_docs):
+            doc = {"doc_id": i + 1, "title": f"Synthetic {i + 1}", "text": generate_document(doc_bytes, seed + i)}
+            f.write(("," if i else "") + json.dumps(doc) + "\n")
+        f.write("]\n")
+    return path
+
+
+def _sentence(rng):
+    words = [rng.choice(COMMON_WORDS) for _ in range(rng.randint(8, 30))]
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words)), rng.choice(SIGNAL_PHRASES))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng, article):
+    sentences = " ".join(_sentence(rng) for _ in range(rng.randint(3, 8)))
+    return f"Article {article} - {rng.choice(COMMON_WORDS).capitalize()}\n{sentences}\n\n"
@@ -0,0 +1,92 @@
+"""
+Round-trip check for output_builder in every output format.
+
+For random outputs (0 to many sections, unicode text, with and without
+QA and loss reports) and each of json, ndjson and binary:
+
+- load_final_output(file) == what build_final_output returned
+- a file written section by section through OutputWriter loads the same
+- BinaryOutputReader.section(i) returns section i
+
+    python checks/check_output_roundtrip.py --cases 500 --seed 0
+
+Exits non-zero on the first mismatch.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "doc_compressor"))
+
+from output_builder import (
+    EXTENSIONS, SERIALIZERS, BinaryOutputReader, OutputWriter, build_final_output, load_final_output
+)
+
+WORDS = ["risk", "security", "personal data", "ä", "😀", "\"quoted\"", "line\nbreak", "tab\t", "{", "}", "\\"]
+
+
+def random_output(rng):
+    text = lambda: " ".join(rng.choices(WORDS, k=rng.randint(0, 8)))
+    sections = [
+        {"chunk_id": i + 1, "summary": text(), "categories": rng.sample(["risk", "security", "personal_data"], rng.randint(0, 3))}
+        for i in range(rng.choice([0, 1, 2, rng.randint(3, 200)]))
+    ]
+    metadata = {"source_file": text() + ".txt", "document_type": "text", "total_chunks": len(sections)}
+    compressed = {"section_summaries": sections, "key_facts": [text()] if rng.random() < 0.3 else [],
+                  "risks": [], "exceptions": []}
+    qa_block = [{"question": text(), "answer": text(), "confidence": rng.random()}] if rng.random() < 0.5 else None
+    loss_report = None
+    if rng.random() < 0.7:
+        ratio = round(rng.random(), 2)
+        loss_report = {"original_chars": rng.randint(1, 10 ** 9), "compressed_chars": rng.randint(0, 10 ** 6),
+                       "compression_ratio": ratio, "loss_reasoning": text()}
+    return metadata, compressed, qa_block, loss_report
+
+
+def check(case, what, got, want):
+    if got != want:
+        print(f"[FAIL] case {case}: {what}\n  got={got!r}\n  expected={want!r}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in range(args.cases):
+            metadata, compressed, qa_block, loss_report = random_output(rng)
+            sections = compressed["section_summaries"]
+
+            for output_format in SERIALIZERS:
+                path = os.path.join(tmp, "whole" + EXTENSIONS[output_format])
+                want = build_final_output(metadata, compressed, qa_block, loss_report,
+                                          file_path=path, output_format=output_format)
+                check(case, f"{output_format}: build_final_output round trip", load_final_output(path), want)
+
+                streamed = os.path.join(tmp, "streamed" + EXTENSIONS[output_format])
+                with OutputWriter(streamed, output_format) as writer:
+                    for section in sections:
+                        writer.write_section(section)
+                    writer.finish(metadata, compressed, qa_block, loss_report)
+                check(case, f"{output_format}: OutputWriter round trip", load_final_output(streamed), want)
+
+                if output_format == "binary":
+                    with BinaryOutputReader(streamed) as reader:
+                        check(case, "binary: section count", len(reader), len(sections))
+                        for i in rng.sample(range(len(sections)), min(5, len(sections))):
+                            check(case, f"binary: section({i})", reader.section(i), sections[i])
+
+    print(f"[OK] {', '.join(SERIALIZERS)} outputs round-tripped on {args.cases} cases")
+
+
+if __name__ == "__main__":
+    main()
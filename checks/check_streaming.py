@@ -0,0 +1,131 @@
+"""
+Randomised equivalence check for the streaming cleaner and chunkers.
+
+Under random block splits, including empty blocks and splits inside
+whitespace runs and words:
+
+- "".join(iter_clean_text(blocks)) == clean_text(text)
+- iter_chunk_text(blocks) == chunk_text(text)
+- iter_chunk_text_spans(blocks) == the whole-string sentence packer below
+  (chunk_text_spans itself now runs the streaming version on one piece)
+
+    python checks/check_streaming.py --cases 3000 --seed 0
+
+Exits non-zero on the first mismatch.
+"""
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "doc_compressor"))
+
+from cleaner import clean_text, iter_clean_text
+from chunker import (
+    TOKEN_PATTERN, _split_long_sentence, chunk_text, iter_chunk_text, iter_chunk_text_spans, sentence_spans
+)
+
+# Words, sentence ends and every kind of whitespace run the cleaner and
+# the sentence splitter treat specially
+FRAGMENTS = ["word", "x", "Risk", "é", "7", ",", ".", "!", "?", " ", "  ", "\t", "\n", "\n\n", "\n \n", " \t\n\n\n"]
+
+
+def reference_chunk_text_spans(text, max_tokens, overlap_sentences):
+    """The original whole-string packing over sentence_spans(text)."""
+    if not text or text.strip() == "":
+        return []
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        if current:
+            start, end = current[0][0], current[-1][1]
+            chunks.append({"text": text[start:end], "start": start, "end": end,
+                           "tokens": sum(n for _, _, n in current)})
+        carry = current[-overlap_sentences:] if overlap_sentences else []
+        return carry, sum(n for _, _, n in carry)
+
+    for start, end, ends_paragraph in sentence_spans(text):
+        n = len(TOKEN_PATTERN.findall(text, start, end))
+
+        if n > max_tokens:
+            flush()
+            current, current_tokens = [], 0
+            chunks.extend(_split_long_sentence(text, start, end, max_tokens))
+            continue
+
+        if current and current_tokens + n > max_tokens:
+            current, current_tokens = flush()
+            if current_tokens + n > max_tokens:
+                current, current_tokens = [], 0
+
+        current.append((start, end, n))
+        current_tokens += n
+
+        if ends_paragraph and current_tokens >= max_tokens // 2:
+            flush()
+            current, current_tokens = [], 0
+
+    flush()
+    return chunks
+
+
+def random_text(rng):
+    weights = [rng.random() for _ in FRAGMENTS]
+    return "".join(rng.choices(FRAGMENTS, weights, k=rng.randint(0, 400)))
+
+
+def random_blocks(rng, text):
+    cuts = sorted(rng.choices(range(len(text) + 1), k=rng.randint(0, 30)))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+def fail(case, what, text, blocks, got, want):
+    print(f"[FAIL] case {case}: {what}\n  text={text!r}\n  blocks={blocks!r}\n  got={got!r}\n  expected={want!r}")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    for case in range(args.cases):
+        raw = random_text(rng)
+        blocks = random_blocks(rng, raw)
+        got, want = "".join(iter_clean_text(blocks)), clean_text(raw)
+        if got != want:
+            fail(case, "iter_clean_text", raw, blocks, got, want)
+
+        text = want
+        chunk_size = rng.choice([1, 5, 20, 60, 300])
+        overlap = rng.randint(0, chunk_size - 1)
+        blocks = random_blocks(rng, text)
+        got = list(iter_chunk_text(blocks, chunk_size, overlap))
+        want = chunk_text(text, chunk_size, overlap)
+        if got != want:
+            fail(case, f"iter_chunk_text(chunk_size={chunk_size}, overlap={overlap})", text, blocks, got, want)
+
+        # The sentence chunker also sees uncleaned text, with its long whitespace runs
+        text = rng.choice([text, raw])
+        max_tokens = rng.choice([1, 2, 3, 5, 8, 20, 256])
+        overlap_sentences = rng.choice([0, 0, 1, 2])
+        blocks = random_blocks(rng, text)
+        got = list(iter_chunk_text_spans(blocks, max_tokens, overlap_sentences))
+        want = reference_chunk_text_spans(text, max_tokens, overlap_sentences)
+        if got != want:
+            fail(case, f"iter_chunk_text_spans(max_tokens={max_tokens}, overlap_sentences={overlap_sentences})",
+                 text, blocks, got, want)
+
+    print(f"[OK] streaming cleaner and chunkers agreed with the whole-string versions on {args.cases} cases")
+
+
+if __name__ == "__main__":
+    main()
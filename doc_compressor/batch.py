@@ -0,0 +1,392 @@
+"""
+Non-interactive batch mode: compresses every PDF/TXT in a directory (or
+listed in a manifest) and answers a file of questions against each one.
+
+    python doc_compressor/batch.py data/ --questions questions.txt --output-dir out/
+    python doc_compressor/batch.py manifest.txt --questions questions.txt --workers 16
+
+Each document is processed end to end (extract -> clean/chunk -> compress ->
+estimate_loss -> QA) by one worker process and written to its own output
+file (--format json, ndjson or binary). Chunks pack whole sentences up to
+--max-tokens; --chunker chars uses fixed --chunk-size windows instead.
+Workers are recycled every --max-tasks-per-child documents so memory held
+by one huge input does not stay with the worker for the rest of the run.
+A throughput/latency summary is written to <output-dir>/summary.json.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from urllib.parse import quote
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import telemetry
+from extractors.pdf_extractor import extract_text_from_pdf
+from extractors.text_extractor import MmapTextSource
+from cleaner import iter_clean_text
+from chunker import CHUNKERS, DEFAULT_CHUNKER, iter_chunks
+from compressor import iter_compress_chunks
+from loss_estimator import estimate_loss
+from output_builder import EXTENSIONS, SERIALIZERS, OutputWriter
+from qa_engine import InvertedIndex, answer_question
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+SUMMARY_FILE = "summary.json"
+
+# PDF text is cleaned in blocks of this many characters
+BLOCK_CHARS = 1 << 20
+
+
+# ---------------- INPUTS ----------------
+
+def collect_inputs(source):
+    """
+    Returns the document paths to process, sorted.
+
+    `source` is either a directory (searched recursively) or a manifest file
+    with one path per line; relative manifest paths are resolved against the
+    manifest's directory and lines starting with # are ignored.
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(source)
+            for name in names
+            if name.lower().endswith(SUPPORTED_EXTENSIONS)
+        ]
+        return sorted(paths)
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                paths.append(os.path.normpath(os.path.join(base, line)))
+    return sorted(paths)
+
+
+def load_questions(path):
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def output_name(path, root, output_format="json"):
+    """
+    Per-document output file name: the path relative to `root`, with its
+    extension kept and separators percent-encoded, so a/b.txt, a__b.txt and
+    a/b.pdf all map to different files.
+    """
+    rel = os.path.relpath(os.path.abspath(path), root)
+    return quote(rel.replace(os.sep, "/"), safe="") + EXTENSIONS[output_format]
+
+
+def assign_output_names(paths, root, output_format="json"):
+    """
+    Returns {path: file name}, unique within the run and never clashing
+    with summary.json; any remaining clash gets a -2, -3, ... suffix.
+    """
+    used = {SUMMARY_FILE}
+    names = {}
+
+    for path in paths:
+        name = output_name(path, root, output_format)
+        stem, ext = os.path.splitext(name)
+        n = 1
+        while name in used:
+            n += 1
+            name = f"{stem}-{n}{ext}"
+        used.add(name)
+        names[path] = name
+
+    return names
+
+
+# ---------------- WORKER ----------------
+
+@contextmanager
+def _stage(timings, name):
+    start = time.perf_counter()
+    with telemetry.span(name):
+        yield
+    timings[name] = round(time.perf_counter() - start, 6)
+
+
+def _iter_document_blocks(document):
+    if isinstance(document, str):
+        return (document[i:i + BLOCK_CHARS] for i in range(0, len(document), BLOCK_CHARS))
+    return document.iter_blocks()
+
+
+def process_document(path, questions, output_path, chunk_size=300, overlap=50, output_format="json",
+                     chunker=DEFAULT_CHUNKER, max_tokens=256):
+    """
+    Runs the whole pipeline for one document and writes its output file.
+
+    Returns a small result record (never the document itself), so only a
+    few hundred bytes travel back to the parent per document.
+    """
+    timings = {}
+    start = time.perf_counter()
+    document = None
+
+    try:
+        with _stage(timings, "extract"):
+            if path.lower().endswith(".pdf"):
+                # The pool already uses every core; no nested page pool
+                document = extract_text_from_pdf(path, workers=1)
+            else:
+                document = MmapTextSource(path)
+
+        # Sections are written as they are produced; the parts that need the
+        # whole document (metrics, QA, metadata) follow in writer.finish()
+        with OutputWriter(output_path, output_format) as writer:
+            with _stage(timings, "clean_chunk_compress"):
+                chunks = iter_chunks(
+                    iter_clean_text(_iter_document_blocks(document)), chunker,
+                    chunk_size=chunk_size, overlap=overlap, max_tokens=max_tokens,
+                )
+                sections = []
+                for section in iter_compress_chunks(chunks):
+                    writer.write_section(section)
+                    sections.append(section)
+                compressed_data = {"section_summaries": sections, "key_facts": [], "risks": [], "exceptions": []}
+                total_chunks = len(sections)
+
+            with _stage(timings, "estimate_loss"):
+                loss_report = estimate_loss(document, compressed_data) if len(document) else None
+                original_chars = len(document)
+
+            with _stage(timings, "answer_questions"):
+                index = InvertedIndex()
+                index.add(s["summary"] for s in sections)
+                qa_block = []
+                for question in questions:
+                    qa_result = answer_question(question, index=index)
+                    qa_block.append({
+                        "question": question,
+                        "answer": qa_result["answer"],
+                        "why": qa_result["why"],
+                        "source_chunk": qa_result["source_chunk"],
+                        "confidence": qa_result["confidence"]
+                    })
+
+            with _stage(timings, "write_output"):
+                metadata = {
+                    "source_file": os.path.basename(path),
+                    "document_type": "pdf" if path.lower().endswith(".pdf") else "text",
+                    "total_chunks": total_chunks
+                }
+                writer.finish(
+                    metadata=metadata,
+                    compressed_data=compressed_data,
+                    qa_block=qa_block or None,
+                    loss_report=loss_report
+                )
+
+        return {
+            "path": path,
+            "output": output_path,
+            "chars": original_chars,
+            "chunks": total_chunks,
+            "seconds": round(time.perf_counter() - start, 6),
+            "stages": timings,
+        }
+
+    except Exception as e:
+        return {
+            "path": path,
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": round(time.perf_counter() - start, 6),
+            "stages": timings,
+        }
+
+    finally:
+        if isinstance(document, MmapTextSource):
+            document.close()
+
+
+# ---------------- DRIVER ----------------
+
+def run_batch(paths, questions, output_dir, workers=None, max_tasks_per_child=32,
+              chunk_size=300, overlap=50, output_format="json", chunker=DEFAULT_CHUNKER, max_tokens=256,
+              on_result=None):
+    """
+    Processes `paths` across a process pool and returns the result records
+    in completion order. At most a few tasks per worker are in flight, so
+    the parent's memory stays flat however many documents are queued.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths]) if paths else ""
+
+    pool_kwargs = {"max_workers": workers}
+    if sys.version_info >= (3, 11):
+        pool_kwargs["max_tasks_per_child"] = max_tasks_per_child
+
+    names = assign_output_names(paths, root, output_format)
+    results = []
+    suspects = []
+    queue = iter(paths)
+    exhausted = False
+
+    def record(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    def submit(pool, path):
+        output_path = os.path.join(output_dir, names[path])
+        return pool.submit(process_document, path, questions, output_path, chunk_size, overlap, output_format,
+                           chunker, max_tokens)
+
+    # A worker killed mid-task (e.g. by the OOM killer) breaks the whole
+    # pool. Its in-flight documents are set aside and the rest of the queue
+    # continues on a fresh pool.
+    while not exhausted:
+        pending = {}
+        broken = False
+
+        with ProcessPoolExecutor(**pool_kwargs) as pool:
+            while True:
+                while not broken and len(pending) < workers * 4:
+                    path = next(queue, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    pending[submit(pool, path)] = path
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        record(future.result())
+                    except BrokenProcessPool:
+                        broken = True
+                        suspects.append(path)
+
+                if broken and not pending:
+                    break
+
+    # Only one of the set-aside documents killed its worker; rerun each on
+    # its own single-worker pool to find out which
+    for path in suspects:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            try:
+                record(submit(pool, path).result())
+            except BrokenProcessPool as e:
+                record({
+                    "path": path,
+                    "error": f"BrokenProcessPool: worker process died ({e})",
+                    "seconds": None,
+                    "stages": {},
+                })
+
+    return results
+
+
+def summarize(results, wall_seconds, workers):
+    ok = [r for r in results if "error" not in r]
+    latencies = sorted(r["seconds"] for r in ok)
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    stage_totals = {}
+    for r in ok:
+        for stage, seconds in r["stages"].items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+
+    total_chars = sum(r["chars"] for r in ok)
+
+    return {
+        "documents": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 3),
+        "documents_per_second": round(len(ok) / wall_seconds, 3) if wall_seconds else None,
+        "chars_per_second": round(total_chars / wall_seconds) if wall_seconds else None,
+        "total_chars": total_chars,
+        "total_chunks": sum(r["chunks"] for r in ok),
+        "latency_seconds": {
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "max": latencies[-1] if latencies else None,
+        },
+        "mean_stage_seconds": {
+            stage: round(total / len(ok), 6) for stage, total in stage_totals.items()
+        },
+        "errors": [{"path": r["path"], "error": r["error"]} for r in results if "error" in r],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of PDF/TXT files, or a manifest with one path per line")
+    parser.add_argument("--questions", default=None, help="File with one question per line")
+    parser.add_argument("--output-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_output"))
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-tasks-per-child", type=int, default=32,
+                        help="Documents a worker handles before it is replaced")
+    parser.add_argument("--chunk-size", type=int, default=300)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--chunker", choices=CHUNKERS, default=DEFAULT_CHUNKER,
+                        help="Fixed character windows, or sentence-aligned chunks (see --max-tokens)")
+    parser.add_argument("--max-tokens", type=int, default=256, help="Token budget per chunk with --chunker sentences")
+    parser.add_argument("--format", choices=sorted(SERIALIZERS), default="json",
+                        help="Per-document output format (binary supports random access to one section)")
+    args = parser.parse_args()
+
+    paths = collect_inputs(args.source)
+    questions = load_questions(args.questions)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"[INFO] {len(paths)} documents, {len(questions)} questions, {workers} workers")
+
+    def report(result):
+        if "error" in result:
+            print(f"[ERROR] {result['path']}: {result['error']}")
+        else:
+            print(f"[OK] {result['path']} ({result['chunks']} chunks, {result['seconds']:.2f}s)")
+
+    start = time.perf_counter()
+    results = run_batch(
+        paths, questions, args.output_dir,
+        workers=workers,
+        max_tasks_per_child=args.max_tasks_per_child,
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        output_format=args.format,
+        chunker=args.chunker,
+        max_tokens=args.max_tokens,
+        on_result=report,
+    )
+    summary = summarize(results, time.perf_counter() - start, workers)
+
+    summary_path = os.path.join(args.output_dir, SUMMARY_FILE)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+
+    print(f"\n[INFO] {summary['succeeded']}/{summary['documents']} documents in {summary['wall_seconds']}s "
+          f"({summary['documents_per_second']} docs/s), p95 latency {summary['latency_seconds']['p95']}s")
+    print(f"[INFO] Summary written to {summary_path}")
+
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
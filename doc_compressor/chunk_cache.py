@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import telemetry
+from chunker import batched
+from compressor import CATEGORY_SUMMARIES, SIGNAL_TERMS, compress_chunks
+
+# Bump to invalidate every cached summary after a change to compress_chunks
+CACHE_VERSION = 2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, ".cache", "chunk_summaries.json")
+
+
+class ChunkCache:
+    """
+    Persistent chunk -> summary cache keyed by a content hash of the chunk
+    text and the compressor configuration. Entries are kept in LRU order and
+    the oldest are dropped beyond max_entries when saved.
+
+    Thread-safe: p4.py shares one instance across Streamlit sessions.
+    Keys come from whole chunks, so feed it sentence-aligned chunks
+    (chunker.chunk_text_spans): an edit then only changes the chunks around
+    it, where fixed character windows would all shift.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=200000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = OrderedDict(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Ignoring unreadable chunk cache {path}: {e}")
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                telemetry.count("cache_misses_total", cache="chunk_summaries")
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            telemetry.count("cache_hits_total", cache="chunk_summaries")
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+
+    def save(self):
+        if not self.path:
+            return
+
+        # Snapshot under the lock; serialise outside it
+        with self._lock:
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            snapshot = list(self.entries.items())
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(snapshot), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+def config_key(matcher=None):
+    """Hash of everything besides the chunk text that shapes a summary."""
+    signal_terms = matcher.signal_terms if matcher else SIGNAL_TERMS
+    config = [CACHE_VERSION, signal_terms, CATEGORY_SUMMARIES]
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def compress_chunks_cached(chunks, cache, matcher=None, batch_size=1024):
+    """
+    Same output as compress_chunks(chunks, matcher), but only chunks whose
+    text (or the compressor configuration) changed since they were last
+    seen are recompressed.
+
+    `chunks` may be any iterable; it is consumed `batch_size` chunks at a
+    time, so only the summaries (not the chunk texts) are kept.
+    """
+    prefix = config_key(matcher)
+    section_summaries = []
+
+    for batch in batched(chunks, batch_size):
+        keys = [hashlib.sha256((prefix + chunk).encode("utf-8")).hexdigest() for chunk in batch]
+
+        entries = [cache.get(key) for key in keys]
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+
+        if missing:
+            fresh = compress_chunks([batch[i] for i in missing], matcher)["section_summaries"]
+            for i, section in zip(missing, fresh):
+                entries[i] = {"summary": section["summary"], "categories": section["categories"]}
+                cache.put(keys[i], entries[i])
+
+        for entry in entries:
+            section_summaries.append({
+                "chunk_id": len(section_summaries) + 1,
+                "summary": entry["summary"],
+                "categories": entry["categories"]
+            })
+
+    return {
+        "section_summaries": section_summaries,
+        "key_facts": [],
+        "risks": [],
+        "exceptions": []
+    }
@@ -1,3 +1,6 @@
+import itertools
+import re
+
 def chunk_text(text, chunk_size=500, overlap=50):
     """
     Splits cleaned text into overlapping chunks.
@@ -32,3 +35,268 @@ def chunk_text(text, chunk_size=500, overlap=50):
             start = 0
 
     return chunks
+
+
+def iter_chunk_text(pieces, chunk_size=500, overlap=50):
+    """
+    Streaming chunk_text over an iterable of text pieces, e.g. the output
+    of cleaner.iter_clean_text().
+
+    Yields exactly the chunks chunk_text("".join(pieces)) would return,
+    while only holding about one chunk plus one piece in memory.
+    """
+    pieces = iter(pieces)
+    buffer = ""
+    base = 0          # offset of buffer[0] in the full text
+    start = 0
+    exhausted = False
+
+    while True:
+        end = start + chunk_size
+
+        while not exhausted and base + len(buffer) < end:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+            else:
+                # Drop text before the current chunk only when growing the
+                # buffer, so each piece is copied a bounded number of times
+                buffer = buffer[start - base:] + piece
+                base = start
+
+        if start >= base + len(buffer):
+            return
+
+        chunk = buffer[start - base:end - base].strip()
+        if len(chunk) > 50:   # avoid tiny tail chunks
+            yield chunk
+
+        start = end - overlap
+        if start < 0:
+            start = 0
+
+
+def batched(iterable, size):
+    """Yields lists of up to `size` items, consuming `iterable` lazily."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------- SENTENCE-AWARE TOKEN CHUNKING ----------------
+
+# Whitespace after sentence punctuation, or a blank line (paragraph break)
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+# Rough subword-tokenizer proxy: words and standalone punctuation
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def chunk_text_spans(text, max_tokens=256, overlap_sentences=0):
+    """
+    Splits text into chunks on sentence and paragraph boundaries, packing
+    whole sentences up to a token budget.
+
+    Boundaries are found in one regex pass and chunks are sliced once from
+    the original text, so the spans index straight back into it. A
+    paragraph break closes the current chunk once it is at least half full;
+    a single sentence longer than the budget is split on token boundaries.
+
+    Args:
+        text (str): Cleaned input text
+        max_tokens (int): Token budget per chunk (TOKEN_PATTERN estimate)
+        overlap_sentences (int): Trailing sentences repeated at the start
+            of the next chunk
+
+    Returns:
+        list[dict]: {"text", "start", "end", "tokens"} per chunk
+    """
+
+    if not text or text.strip() == "":
+        return []
+
+    return list(iter_chunk_text_spans([text], max_tokens, overlap_sentences))
+
+
+def iter_chunk_text_spans(pieces, max_tokens=256, overlap_sentences=0):
+    """
+    Streaming chunk_text_spans over an iterable of text pieces, e.g. the
+    output of cleaner.iter_clean_text().
+
+    Yields exactly the chunks chunk_text_spans("".join(pieces)) returns,
+    with start/end offsets into the joined text. A sentence is only cut
+    once the whitespace run ending it is closed by later text, so only
+    the open chunk and the unfinished sentence are buffered. An unfinished
+    sentence past max_tokens is emitted in full token groups as they
+    complete, so text without sentence breaks is still held in bounded
+    memory.
+    """
+    buffer = ""
+    base = 0              # offset of buffer[0] in the full text
+    pos = 0               # where the next sentence (or long-sentence remainder) starts
+    scan = 0              # where the search for the next sentence break resumes
+    long_sentence = False # the open sentence is over budget; its full groups from pos are out
+    current = []          # (start, end, tokens) of sentences in the open chunk
+    current_tokens = 0
+
+    def flush():
+        if current:
+            tokens = sum(n for _, _, n in current)
+            start, end = current[0][0], current[-1][1]
+            yield {"text": buffer[start - base:end - base], "start": start, "end": end, "tokens": tokens}
+
+    def carry():
+        kept = current[-overlap_sentences:] if overlap_sentences else []
+        return kept, sum(n for _, _, n in kept)
+
+    def split_long(start, end):
+        for chunk in _split_long_sentence(buffer, start - base, end - base, max_tokens):
+            chunk["start"] += base
+            chunk["end"] += base
+            yield chunk
+
+    def add_sentence(start, end, ends_paragraph):
+        nonlocal current, current_tokens
+        n = len(TOKEN_PATTERN.findall(buffer, start - base, end - base))
+
+        if n > max_tokens:
+            yield from flush()
+            current, current_tokens = [], 0
+            yield from split_long(start, end)
+            return
+
+        if current and current_tokens + n > max_tokens:
+            yield from flush()
+            current, current_tokens = carry()
+            if current_tokens + n > max_tokens:
+                current, current_tokens = [], 0
+
+        current.append((start, end, n))
+        current_tokens += n
+
+        # Overlap is not carried across paragraph breaks
+        if ends_paragraph and current_tokens >= max_tokens // 2:
+            yield from flush()
+            current, current_tokens = [], 0
+
+    def end_sentence(end, ends_paragraph):
+        nonlocal long_sentence
+        if long_sentence:
+            # The groups not yet emitted; current was flushed on entry
+            yield from split_long(pos, end)
+            long_sentence = False
+        else:
+            span = _trim(buffer, pos - base, end - base)
+            if span:
+                yield from add_sentence(base + span[0], base + span[1], ends_paragraph)
+
+    for piece in itertools.chain(pieces, [None]):
+        final = piece is None
+        if not final:
+            # Keep only text still needed: the open chunk and the open sentence
+            keep = min([pos] + [s for s, _, _ in current[:1]])
+            buffer = buffer[keep - base:] + piece
+            base = keep
+            # Breaks inside a whitespace run that reaches the end of the
+            # buffer may still grow, so stop before them
+            limit = base + len(buffer.rstrip())
+        else:
+            limit = base + len(buffer)
+
+        for m in SENTENCE_BREAK.finditer(buffer, scan - base):
+            if not final and base + m.end() >= limit:
+                break
+            ends_paragraph = buffer.count("\n", m.start(), m.end()) >= 2
+            yield from end_sentence(base + m.start(), ends_paragraph)
+            pos = base + m.end()
+
+        if final:
+            break
+
+        # Every break before limit was consumed, and one ending past it starts
+        # at or after it (breaks are whitespace; buffer[limit - 1] is not)
+        scan = max(pos, limit)
+
+        # Tokens ending before limit cannot grow with the next piece
+        tokens = (m.span() for m in TOKEN_PATTERN.finditer(buffer, pos - base, limit - base) if m.end() < limit - base)
+        if not long_sentence:
+            ahead = list(itertools.islice(tokens, max_tokens + 1))
+            if len(ahead) <= max_tokens:
+                continue
+            yield from flush()
+            current, current_tokens = [], 0
+            long_sentence = True
+            tokens = itertools.chain(ahead, tokens)
+
+        group = []
+        for span in tokens:
+            group.append(span)
+            if len(group) == max_tokens:
+                s, e = group[0][0], group[-1][1]
+                yield {"text": buffer[s:e], "start": base + s, "end": base + e, "tokens": max_tokens}
+                pos = base + e
+                group = []
+
+    yield from end_sentence(base + len(buffer), True)
+
+    yield from flush()
+
+
+def sentence_spans(text):
+    """Yields (start, end, ends_paragraph) per sentence, whitespace trimmed."""
+    pos = 0
+    for m in SENTENCE_BREAK.finditer(text):
+        span = _trim(text, pos, m.start())
+        if span:
+            yield span[0], span[1], text.count("\n", m.start(), m.end()) >= 2
+        pos = m.end()
+
+    span = _trim(text, pos, len(text))
+    if span:
+        yield span[0], span[1], True
+
+
+def _trim(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def _split_long_sentence(text, start, end, max_tokens):
+    token_spans = [m.span() for m in TOKEN_PATTERN.finditer(text, start, end)]
+
+    for i in range(0, len(token_spans), max_tokens):
+        group = token_spans[i:i + max_tokens]
+        s, e = group[0][0], group[-1][1]
+        yield {"text": text[s:e], "start": s, "end": e, "tokens": len(group)}
+
+
+# ---------------- CHUNKER SELECTION ----------------
+
+# "chars": fixed character windows (iter_chunk_text)
+# "sentences": sentence-aligned token budgets (iter_chunk_text_spans); an
+#   edit only changes the chunks around it, so chunk caches keep hitting
+CHUNKERS = ("chars", "sentences")
+
+# Default for every entry point (main1, p4, batch, compress_hierarchical)
+DEFAULT_CHUNKER = "sentences"
+
+
+def iter_chunks(pieces, chunker=DEFAULT_CHUNKER, chunk_size=500, overlap=50, max_tokens=256, overlap_sentences=0):
+    """
+    Yields chunk texts from the chosen chunker. chunk_size/overlap apply to
+    "chars", max_tokens/overlap_sentences to "sentences".
+    """
+    if chunker == "chars":
+        return iter_chunk_text(pieces, chunk_size=chunk_size, overlap=overlap)
+    if chunker == "sentences":
+        spans = iter_chunk_text_spans(pieces, max_tokens=max_tokens, overlap_sentences=overlap_sentences)
+        return (span["text"] for span in spans)
+    raise ValueError(f"Unknown chunker '{chunker}'. Choose from: {', '.join(CHUNKERS)}")
@@ -21,3 +21,42 @@ def clean_text(text: str) -> str:
     text = text.strip()
 
     return text
+
+
+def iter_clean_text(blocks):
+    """
+    Streaming clean_text over an iterable of text blocks (pages, file reads).
+
+    Yields cleaned pieces whose concatenation equals clean_text("".join(blocks)).
+    Both substitutions only ever act inside a run of whitespace, so each
+    block is cleaned up to its last non-whitespace character and the
+    trailing whitespace run is carried into the next block. The carry is
+    itself normalised, which keeps it small even on long blank stretches.
+    """
+    carry = ""
+    started = False
+
+    for block in blocks:
+        buffer = carry + block
+        end = len(buffer.rstrip())
+
+        if end == 0:
+            carry = _normalize(buffer)
+            continue
+
+        piece = _normalize(buffer[:end])
+        carry = _normalize(buffer[end:])
+
+        if not started:
+            # Leading whitespace of the whole text is stripped
+            piece = piece.lstrip()
+            started = True
+
+        yield piece
+
+    # Whatever is still carried is trailing whitespace, which strip() drops
+
+
+def _normalize(text):
+    text = re.sub(r'\n\s*\n+', '\n\n', text)
+    return re.sub(r'[ \t]+', ' ', text)
@@ -1,27 +1,207 @@
-def compress_chunks(chunks):
-    compressed = {
-        "section_summaries": [],
+import math
+import re
+from collections import Counter
+
+from chunker import TOKEN_PATTERN, sentence_spans
+from qa_engine import tokenize
+
+# Signal categories in priority order: the first category a chunk hits
+# picks its canned summary. Terms are matched case-insensitively as
+# substrings, like the original `term in text` checks.
+SIGNAL_TERMS = {
+    "risk": ["risk"],
+    "security": ["security"],
+    "personal_data": ["personal data"],
+}
+
+CATEGORY_SUMMARIES = {
+    "risk": "This section discusses risk management and related safeguards.",
+    "security": "This section discusses security and protection measures.",
+    "personal_data": "This section discusses processing of personal data.",
+}
+
+
+class SignalMatcher:
+    """
+    Finds every category whose terms occur in a chunk, in one regex pass.
+
+    The pattern is a zero-width lookahead over all terms (longest first),
+    so it stops at every position where some term starts, including inside
+    or across other matches. At each stop the longest matching term is
+    reported; every shorter term matching there is a prefix of it, so its
+    precomputed prefix categories cover nested terms. Overlapping and
+    nested terms therefore hit all their categories, like the original
+    `term in text` checks.
+    """
+
+    def __init__(self, signal_terms=None):
+        self.signal_terms = signal_terms or SIGNAL_TERMS
+        self.categories = list(self.signal_terms)
+
+        term_categories = {}
+        for category, terms in self.signal_terms.items():
+            for term in terms:
+                term_categories.setdefault(term.lower(), set()).add(category)
+
+        # term -> categories of every term that is a prefix of it (itself included)
+        self.prefix_categories = {
+            term: frozenset().union(*(cats for t, cats in term_categories.items() if term.startswith(t)))
+            for term in term_categories
+        }
+
+        # An empty term is in every text, as with `"" in text`
+        self.always = frozenset(term_categories.pop("", ()))
+
+        terms = sorted(term_categories, key=len, reverse=True)
+        self.pattern = (
+            re.compile("(?=(" + "|".join(re.escape(t) for t in terms) + "))") if terms else None
+        )
+
+    def match(self, text):
+        """Returns the categories hit by text, in priority order."""
+        hits = set(self.always)
+        if self.pattern is None:
+            return [c for c in self.categories if c in hits]
+
+        for m in self.pattern.finditer(text.lower()):
+            hits |= self.prefix_categories[m.group(1)]
+            if len(hits) == len(self.categories):
+                break
+
+        return [c for c in self.categories if c in hits]
+
+
+_DEFAULT_MATCHER = SignalMatcher()
+
+
+def compress_chunks(chunks, matcher=None):
+    return {
+        "section_summaries": list(iter_compress_chunks(chunks, matcher)),
         "key_facts": [],
         "risks": [],
         "exceptions": []
     }
 
+
+def iter_compress_chunks(chunks, matcher=None):
+    """Yields compress_chunks' section summaries one chunk at a time."""
+    matcher = matcher or _DEFAULT_MATCHER
+
     for idx, chunk in enumerate(chunks):
-        text = chunk.lower()
+        categories = matcher.match(chunk)
 
         # smarter rule-based summary
-        if "risk" in text:
-            summary = "This section discusses risk management and related safeguards."
-        elif "security" in text:
-            summary = "This section discusses security and protection measures."
-        elif "personal data" in text:
-            summary = "This section discusses processing of personal data."
+        canned = [c for c in categories if c in CATEGORY_SUMMARIES]
+        if canned:
+            summary = CATEGORY_SUMMARIES[canned[0]]
         else:
             summary = chunk.split(".")[0].strip() + "."
 
-        compressed["section_summaries"].append({
+        yield {
             "chunk_id": idx + 1,
-            "summary": summary
+            "summary": summary,
+            "categories": categories
+        }
+
+
+# ---------------- QUERY-AWARE EXTRACTIVE COMPRESSION ----------------
+
+# Added to a sentence's score for each signal category it mentions
+SIGNAL_BONUS = 0.1
+
+
+def compress_extractive(text, query=None, ratio=0.2, token_budget=None, matcher=None):
+    """
+    Keeps the highest-signal sentences of `text` under a size target.
+
+    Sentences are scored by TF-IDF cosine similarity to the query (or, with
+    no query, by their mean TF-IDF weight), plus SIGNAL_BONUS per signal
+    category they mention. The best ones are kept until `token_budget`
+    tokens or `ratio` of the original characters is reached, then put back
+    in document order. The best sentence is always kept, cut to the budget
+    if it is longer on its own.
+
+    The whole document is handled in one pass over its sentences; every
+    kept sentence carries its (start, end) span into `text`.
+
+    Returns the same structure as compress_chunks, so estimate_loss,
+    answer_question and build_final_output work unchanged.
+    """
+    matcher = matcher or _DEFAULT_MATCHER
+
+    compressed = {
+        "section_summaries": [],
+        "key_facts": [],
+        "risks": [],
+        "exceptions": []
+    }
+
+    spans = [(start, end) for start, end, _ in sentence_spans(text or "")]
+    if not spans:
+        return compressed
+
+    sentence_terms = [Counter(tokenize(text[start:end])) for start, end in spans]
+
+    doc_freq = Counter()
+    for terms in sentence_terms:
+        doc_freq.update(terms.keys())
+
+    n = len(spans)
+    idf = {term: math.log((n + 1) / (df + 1)) + 1 for term, df in doc_freq.items()}
+
+    query_weights = {t: tf * idf.get(t, 0.0) for t, tf in Counter(tokenize(query or "")).items()}
+    query_norm = math.sqrt(sum(w * w for w in query_weights.values()))
+
+    # ---------- SCORE EVERY SENTENCE ----------
+    scored = []
+    for i, ((start, end), terms) in enumerate(zip(spans, sentence_terms)):
+        if not terms:
+            score = 0.0
+        elif query_norm:
+            norm = math.sqrt(sum((tf * idf[t]) ** 2 for t, tf in terms.items()))
+            dot = sum(tf * idf[t] * query_weights[t] for t, tf in terms.items() if t in query_weights)
+            score = dot / (norm * query_norm)
+        else:
+            score = sum(tf * idf[t] for t, tf in terms.items()) / sum(terms.values())
+
+        categories = matcher.match(text[start:end])
+        score += SIGNAL_BONUS * len(categories)
+        scored.append((score, i, categories))
+
+    # ---------- SELECT UNDER BUDGET ----------
+    char_budget = len(text) * ratio
+    used_chars = 0
+    used_tokens = 0
+    selected = []
+
+    for score, i, categories in sorted(scored, key=lambda s: (-s[0], s[1])):
+        start, end = spans[i]
+        if token_budget is not None:
+            token_ends = [m.end() for m in TOKEN_PATTERN.finditer(text, start, end)]
+            if used_tokens + len(token_ends) > token_budget:
+                if selected:
+                    continue
+                # Never return nothing: the best sentence is kept, cut to the budget
+                end = token_ends[max(1, token_budget) - 1]
+            used_tokens += len(TOKEN_PATTERN.findall(text, start, end))
+        else:
+            if used_chars + (end - start) > char_budget:
+                if selected:
+                    continue
+                end = start + max(1, int(char_budget))
+                while text[end - 1].isspace():
+                    end -= 1
+            used_chars += end - start
+        selected.append((i, end, score, categories))
+
+    for rank, (i, end, score, categories) in enumerate(sorted(selected)):
+        start = spans[i][0]
+        compressed["section_summaries"].append({
+            "chunk_id": rank + 1,
+            "summary": text[start:end],
+            "span": [start, end],
+            "score": round(score, 4),
+            "categories": categories
         })
 
     return compressed
@@ -1,5 +1,121 @@
+import codecs
+import io
+import mmap
+import os
+
+import telemetry
+
+# Bytes decoded per block when streaming a mapped file
+READ_BLOCK_BYTES = 1 << 20
+
+# UTF-8 continuation bytes (10xxxxxx) never start a character
+_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+
 def extract_text_from_txt(path):
-    with open(path, "r", encoding="utf-8") as f:
-        data = f.read()
-        print("TXT LENGTH:", len(data))   # DEBUG
-        return data
+    with telemetry.span("extract_txt", path=path) as span:
+        with open(path, "r", encoding="utf-8") as f:
+            data = f.read()
+        span.set(chars=len(data))
+
+    telemetry.debug("TXT LENGTH", path=path, chars=len(data))
+    return data
+
+
+class MmapTextSource:
+    """
+    Lazy, memory-mapped view of a UTF-8 text file.
+
+    Produces the same text as extract_text_from_txt() (including universal
+    newline translation) without ever holding the whole file as a string:
+
+        with MmapTextSource(path) as source:
+            len(source)               # character count, for estimate_loss
+            for block in source.iter_blocks():
+                ...                   # decoded str blocks, in order
+            source.text_at(0, 4096)   # decode a byte range
+
+    Pages are only faulted in as they are read, so files larger than RAM
+    can be streamed through the cleaner and chunker.
+    """
+
+    def __init__(self, path, block_bytes=READ_BLOCK_BYTES):
+        self.path = path
+        self.block_bytes = block_bytes
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._length = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        """Number of decoded characters, counted without decoding."""
+        if self._length is None:
+            with telemetry.span("count_chars", path=self.path, bytes=self.size):
+                self._length = self._count_chars()
+        return self._length
+
+    def iter_blocks(self):
+        """
+        Yields decoded text blocks. A character split across two byte blocks
+        (or a \\r\\n pair) is held back by the incremental decoder until the
+        next block completes it.
+        """
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(), translate=True
+        )
+
+        for start in range(0, self.size, self.block_bytes):
+            text = decoder.decode(self._map[start:start + self.block_bytes])
+            if text:
+                yield text
+
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def text_at(self, start, stop):
+        """
+        Decodes bytes [start, stop). Both offsets are moved back to the
+        nearest character boundary, so any byte offsets can be passed.
+        """
+        start = self._boundary(max(0, start))
+        stop = self._boundary(min(stop, self.size))
+        if stop <= start:
+            return ""
+        text = bytes(self._map[start:stop]).decode("utf-8")
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    # ---------------- INTERNALS ----------------
+
+    def _boundary(self, offset):
+        while 0 < offset < self.size and 0x80 <= self._map[offset] < 0xC0:
+            offset -= 1
+        return offset
+
+    def _count_chars(self):
+        chars = 0
+        previous_cr = False
+
+        for start in range(0, self.size, self.block_bytes):
+            block = self._map[start:start + self.block_bytes]
+            # Each character has exactly one non-continuation byte, and
+            # newline translation folds every \r\n pair into one character
+            chars += len(block.translate(None, _CONTINUATION_BYTES)) - block.count(b"\r\n")
+            if previous_cr and block[:1] == b"\n":
+                chars -= 1
+            previous_cr = block[-1:] == b"\r"
+
+        return chars
@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from chunker import DEFAULT_CHUNKER, iter_chunks
+from compressor import SIGNAL_TERMS, compress_chunks, compress_extractive
+
+# Below this many texts per level a process pool costs more than it saves
+PARALLEL_MIN_ITEMS = 64
+
+
+def compress_hierarchical(text, target_chars=4000, fan_in=8, chunk_size=300, overlap=50, workers=None,
+                          chunker=DEFAULT_CHUNKER, max_tokens=256):
+    """
+    Map-reduce compression for very long documents.
+
+    Level 0 compresses every chunk (chunker.iter_chunks with `chunker` ->
+    compress_chunks) across worker processes. Each further level merges up
+    to `fan_in` sibling nodes: their categories are unioned, their distinct
+    summaries are joined, and when that is longer than both the node's share of
+    `target_chars` and its longest child the highest-signal sentences are
+    kept (compress_extractive). Levels repeat while the top is over
+    `target_chars`, has more than one node and still shrinks; if it is then
+    still over budget, a final level reduces it to one root of at most
+    `target_chars` characters.
+
+    Returns the compress_chunks structure with the top level as
+    "section_summaries", plus every level under "levels" so a reader can
+    drill down from a section to the chunks it came from.
+    """
+    if fan_in < 2:
+        raise ValueError(f"fan_in must be at least 2, got {fan_in}")
+
+    chunks = list(iter_chunks([text], chunker, chunk_size=chunk_size, overlap=overlap, max_tokens=max_tokens))
+
+    compressed = {
+        "section_summaries": [],
+        "key_facts": [],
+        "risks": [],
+        "exceptions": [],
+        "levels": []
+    }
+
+    if not chunks:
+        return compressed
+
+    workers = workers or os.cpu_count() or 1
+
+    # ---------- LEVEL 0: LEAVES ----------
+    leaves = []
+    for i, (summary, categories) in enumerate(_parallel_map(_compress_batch, chunks, workers)):
+        leaves.append({
+            "node_id": f"L0-{i + 1}",
+            "level": 0,
+            "summary": summary,
+            "categories": categories,
+            "children": [],
+            "source_chunks": [i + 1, i + 1]
+        })
+    levels = [leaves]
+
+    # ---------- REDUCE UNTIL IT FITS ----------
+    current = leaves
+    current_chars = sum(len(n["summary"]) for n in current)
+
+    while len(current) > 1 and current_chars > target_chars:
+        level = len(levels)
+        groups = [current[i:i + fan_in] for i in range(0, len(current), fan_in)]
+        # A node may keep as much as its longest child, so each level shrinks
+        # by about fan_in rather than being squeezed to the target at once
+        share = target_chars // len(groups)
+        jobs = [
+            ([n["summary"] for n in group], max(1, share, max(len(n["summary"]) for n in group)))
+            for group in groups
+        ]
+
+        merged = []
+        for i, (group, summary) in enumerate(zip(groups, _parallel_map(_reduce_batch, jobs, workers))):
+            merged.append({
+                "node_id": f"L{level}-{i + 1}",
+                "level": level,
+                "summary": summary,
+                "categories": _merge_categories(n["categories"] for n in group),
+                "children": [n["node_id"] for n in group],
+                "source_chunks": [group[0]["source_chunks"][0], group[-1]["source_chunks"][1]]
+            })
+
+        merged_chars = sum(len(n["summary"]) for n in merged)
+        if merged_chars >= current_chars:
+            break
+
+        levels.append(merged)
+        current, current_chars = merged, merged_chars
+
+    # ---------- FINAL STEP: FIT THE BUDGET ----------
+    # Nodes keep as much as their longest child, so the top can still be
+    # over target_chars; one root squeezed to the target closes the gap
+    if current_chars > target_chars:
+        level = len(levels)
+        root = {
+            "node_id": f"L{level}-1",
+            "level": level,
+            "summary": _reduce_summaries([n["summary"] for n in current], target_chars),
+            "categories": _merge_categories(n["categories"] for n in current),
+            "children": [n["node_id"] for n in current],
+            "source_chunks": [current[0]["source_chunks"][0], current[-1]["source_chunks"][1]]
+        }
+        levels.append([root])
+        current = [root]
+
+    compressed["levels"] = levels
+    compressed["section_summaries"] = [
+        {"chunk_id": i + 1, "summary": n["summary"], "categories": n["categories"], "node_id": n["node_id"]}
+        for i, n in enumerate(current)
+    ]
+
+    return compressed
+
+
+def drill_down(compressed_data, node_id):
+    """Returns the child nodes one level below `node_id`."""
+    for level in compressed_data.get("levels", []):
+        for node in level:
+            if node["node_id"] == node_id:
+                wanted = set(node["children"])
+                below = compressed_data["levels"][node["level"] - 1] if node["level"] else []
+                return [n for n in below if n["node_id"] in wanted]
+    raise KeyError(node_id)
+
+
+def _parallel_map(fn, items, workers):
+    """
+    Applies fn (which takes a list and returns a list) to items in order,
+    across processes when there are enough of them.
+    """
+    if workers <= 1 or len(items) < PARALLEL_MIN_ITEMS:
+        return fn(items)
+
+    step = -(-len(items) // (workers * 4))
+    batches = [items[i:i + step] for i in range(0, len(items), step)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch_results in pool.map(fn, batches):
+            results.extend(batch_results)
+    return results
+
+
+def _compress_batch(texts):
+    return [(s["summary"], s["categories"]) for s in compress_chunks(texts)["section_summaries"]]
+
+
+def _reduce_batch(jobs):
+    return [_reduce_summaries(summaries, budget) for summaries, budget in jobs]
+
+
+def _reduce_summaries(summaries, budget):
+    """Joins distinct child summaries; over budget, keeps the best sentences."""
+    distinct = list(dict.fromkeys(s.strip() for s in summaries if s.strip()))
+    merged = " ".join(distinct)
+    if len(merged) <= budget:
+        return merged
+
+    # Keeps at least the best sentence, cut to the budget if it has to be
+    kept = compress_extractive(merged, ratio=budget / len(merged))["section_summaries"]
+    # The joining spaces are not in the sentence budget; drop the weakest
+    # sentences until they fit too
+    while len(kept) > 1 and sum(len(s["summary"]) for s in kept) + len(kept) - 1 > budget:
+        kept.remove(min(kept, key=lambda s: s["score"]))
+    return " ".join(s["summary"] for s in kept)
+
+
+def _merge_categories(category_lists):
+    hits = set()
+    for categories in category_lists:
+        hits.update(categories)
+    order = list(SIGNAL_TERMS)
+    return sorted(hits, key=lambda c: order.index(c) if c in order else len(order))
@@ -0,0 +1,48 @@
+from collections import OrderedDict
+import threading
+
+import telemetry
+
+
+class LRUCache:
+    """
+    Small thread-safe mapping that evicts the least recently used entry once
+    more than maxsize entries are stored.
+    """
+
+    def __init__(self, maxsize=16, name="lru"):
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                telemetry.count("cache_misses_total", cache=self.name)
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            telemetry.count("cache_hits_total", cache=self.name)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -1,43 +1,78 @@
+import os
+import sys
+
+# Repo root, for telemetry (also imported by the extractors and caches below)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
 from extractors.pdf_extractor import extract_text_from_pdf
-from extractors.text_extractor import extract_text_from_txt
-from cleaner import clean_text
-from chunker import chunk_text
-from compressor import compress_chunks
+from extractors.text_extractor import MmapTextSource
+from cleaner import iter_clean_text
+from chunker import DEFAULT_CHUNKER, iter_chunks
+from chunk_cache import ChunkCache, compress_chunks_cached
 from qa_engine import answer_question
 from output_builder import build_final_output
 from loss_estimator import estimate_loss
 from loss_estimator import estimate_loss
 
-import os
+import telemetry
+
+# Text is cleaned and chunked in blocks of this many characters, so the
+# cleaned document is never materialised as one string
+BLOCK_CHARS = 1 << 20
+
+# Set CHUNKER=chars for fixed character windows; sentence-aligned chunks
+# keep chunk cache keys stable across edits
+CHUNKER = os.getenv("CHUNKER", DEFAULT_CHUNKER)
 
 def extract_document(path):
     if path.endswith(".pdf"):
-        return extract_text_from_pdf(path)
+        # Pages are extracted in parallel, one process per CPU
+        return extract_text_from_pdf(path, workers=os.cpu_count())
     elif path.endswith(".txt"):
-        return extract_text_from_txt(path)
+        # Mapped lazily; decoded block by block as the cleaner reads it
+        return MmapTextSource(path)
     else:
         raise ValueError("Unsupported file format")
 
+def iter_blocks(document):
+    if isinstance(document, str):
+        return (document[i:i + BLOCK_CHARS] for i in range(0, len(document), BLOCK_CHARS))
+    return document.iter_blocks()
+
 if __name__ == "__main__":
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     file_path = os.path.join(BASE_DIR, "data", "sample.txt")
 
-    raw_text = extract_document(file_path)
+    with telemetry.span("extract", path=file_path):
+        raw_text = extract_document(file_path)
     print("TXT LENGTH:", len(raw_text))
 
-    cleaned_text = clean_text(raw_text)
-    chunks = chunk_text(cleaned_text, chunk_size=300, overlap=50)
-
-    compressed_data = compress_chunks(chunks)
+    # Chunks stream from the cleaner straight into compression; only their
+    # summaries are kept. Only chunks that changed since the last run are recompressed
+    with telemetry.span("clean_chunk_compress", chars=len(raw_text), chunker=CHUNKER) as span:
+        chunk_cache = ChunkCache()
+        chunks = iter_chunks(iter_clean_text(iter_blocks(raw_text)), CHUNKER, chunk_size=300, overlap=50)
+        compressed_data = compress_chunks_cached(chunks, chunk_cache)
+        chunk_cache.save()
+        total_chunks = len(compressed_data["section_summaries"])
+        span.set(chunks=total_chunks)
+    print(f"Chunk cache: {chunk_cache.hits} reused, {chunk_cache.misses} recompressed")
 
     # ---------- LOSS REPORT ----------
-    loss_report = estimate_loss(raw_text, compressed_data)
+    with telemetry.span("estimate_loss"):
+        # Only needs len(), which a mapped source answers without decoding
+        loss_report = estimate_loss(raw_text, compressed_data)
+
+    if not isinstance(raw_text, str):
+        # Done with the mapped file
+        raw_text.close()
 
     # ---------- QA ----------
     summaries = [s["summary"] for s in compressed_data["section_summaries"]]
 
     question = input("\nAsk a question about the document:\n> ")
-    qa_result = answer_question(question, summaries)
+    with telemetry.span("answer_question"):
+        qa_result = answer_question(question, summaries)
 
     # ---------- TERMINAL OUTPUT ----------
     print("\n--- ANSWER ---")
@@ -58,7 +93,7 @@ if __name__ == "__main__":
     metadata = {
         "source_file": "sample.txt",
         "document_type": "text",
-        "total_chunks": len(chunks)
+        "total_chunks": total_chunks
     }
 
     qa_block = {
@@ -1,11 +1,53 @@
 import json
 import os
+import struct
+
+# ---------------- BINARY CONTAINER LAYOUT ----------------
+#
+#   MAGIC
+#   records          u32 length + compact UTF-8 JSON payload, back to back
+#   section index    n_sections x (u64 offset, u32 length) of section records
+#   part index       one record: {"metadata": [offset, length], ...}
+#   trailer          u64 section index offset, u32 n_sections,
+#                    u64 part index offset, u32 part index length, MAGIC
+#
+# Reading one section is three small reads (trailer, index slot, record),
+# whatever the number of sections.
+
+MAGIC = b"DCB1"
+_RECORD_LENGTH = struct.Struct("<I")
+_INDEX_SLOT = struct.Struct("<QI")
+_TRAILER = struct.Struct("<QIQI4s")
+
+EXTENSIONS = {"json": ".json", "ndjson": ".ndjson", "binary": ".dcb"}
+
+
+def build_final_output(metadata, compressed_data, qa_block=None, loss_report=None, file_path=None, output_format="json"):
+    """
+    Writes the final output in one of three formats:
+
+    - "json":   the whole result as one pretty-printed JSON document
+    - "ndjson": one JSON record per line: one per section summary, then
+                one per remaining part (metadata, metrics, ...)
+    - "binary": compact records plus an offset index (see read_section)
+
+    compressed_data["section_summaries"] must be a list. To write sections
+    while they are still being produced, use OutputWriter directly.
+    """
+    if output_format not in SERIALIZERS:
+        raise ValueError(f"Unknown output format '{output_format}'. Choose from: {', '.join(SERIALIZERS)}")
 
-def build_final_output(metadata, compressed_data, qa_block=None, loss_report=None, file_path=None):
     if file_path is None:
         BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(BASE_DIR, "compressed_output.json")
+        file_path = os.path.join(BASE_DIR, "compressed_output" + EXTENSIONS[output_format])
+
+    final_output = _final_output(metadata, compressed_data, qa_block, loss_report)
+    SERIALIZERS[output_format](final_output, file_path)
+
+    return final_output
+
 
+def _final_output(metadata, compressed_data, qa_block, loss_report):
     final_output = {
         "metadata": metadata,
         "compressed_representation": compressed_data,
@@ -25,7 +67,253 @@ def build_final_output(metadata, compressed_data, qa_block=None, loss_report=Non
     if qa_block:
         final_output["qa"] = qa_block
 
+    return final_output
+
+
+# ---------------- STREAMING WRITER ----------------
+
+class OutputWriter:
+    """
+    Writes an output file section by section, as the sections are
+    produced, then the remaining parts once they are known:
+
+        with OutputWriter(path, "ndjson") as writer:
+            for section in sections:
+                writer.write_section(section)
+            writer.finish(metadata, compressed_data, qa_block, loss_report)
+
+    In the ndjson and binary formats each section goes to disk as soon as
+    it is written; "json" is one document, so its sections are held until
+    finish(). A writer left without finish() removes its partial file.
+    """
+
+    def __init__(self, file_path, output_format="json"):
+        if output_format not in SERIALIZERS:
+            raise ValueError(f"Unknown output format '{output_format}'. Choose from: {', '.join(SERIALIZERS)}")
+
+        self.file_path = file_path
+        self.output_format = output_format
+        self.n_sections = 0
+        self._sections = []
+        self._section_slots = []
+        self._file = None
+        self._finished = False
+
+        if output_format == "ndjson":
+            self._file = open(file_path, "w", encoding="utf-8")
+        elif output_format == "binary":
+            self._file = open(file_path, "wb")
+            self._file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def write_section(self, section):
+        if self.output_format == "ndjson":
+            self._file.write(_dumps({"part": "section", "value": section}) + "\n")
+        elif self.output_format == "binary":
+            self._section_slots.append(_write_record(self._file, section))
+        else:
+            self._sections.append(section)
+        self.n_sections += 1
+
+    def finish(self, metadata, compressed_data, qa_block=None, loss_report=None):
+        """
+        Writes every part besides the sections and closes the file.
+        Returns the output dict without compressed_data's section summaries.
+        """
+        rest = {k: v for k, v in compressed_data.items() if k != "section_summaries"}
+        parts = _final_output(metadata, rest, qa_block, loss_report)
+        self._finish(parts)
+        return parts
+
+    def _finish(self, parts):
+        if self.output_format == "json":
+            compressed = {"section_summaries": self._sections, **parts["compressed_representation"]}
+            write_json({**parts, "compressed_representation": compressed}, self.file_path)
+        elif self.output_format == "ndjson":
+            for name, value in parts.items():
+                self._file.write(_dumps({"part": name, "value": value}) + "\n")
+        else:
+            part_slots = {name: _write_record(self._file, value) for name, value in parts.items()}
+
+            section_index_offset = self._file.tell()
+            for offset, length in self._section_slots:
+                self._file.write(_INDEX_SLOT.pack(offset, length))
+
+            part_index_offset, part_index_length = _write_record(self._file, part_slots)
+            self._file.write(_TRAILER.pack(
+                section_index_offset, len(self._section_slots),
+                part_index_offset, part_index_length, MAGIC
+            ))
+
+        self._finished = True
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if not self._finished:
+                os.remove(self.file_path)
+
+
+# ---------------- SERIALIZERS ----------------
+
+def _split(final_output):
+    """
+    Returns (parts, sections): every top-level part except the section
+    summaries, and the section summaries themselves.
+    """
+    compressed = final_output["compressed_representation"]
+    parts = dict(final_output)
+    parts["compressed_representation"] = {k: v for k, v in compressed.items() if k != "section_summaries"}
+    return parts, compressed.get("section_summaries", [])
+
+
+def write_json(final_output, file_path):
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(final_output, f, indent=4)
 
-    return final_output
+
+def _write_streamed(final_output, file_path, output_format):
+    parts, sections = _split(final_output)
+    with OutputWriter(file_path, output_format) as writer:
+        for section in sections:
+            writer.write_section(section)
+        writer._finish(parts)
+
+
+def write_ndjson(final_output, file_path):
+    _write_streamed(final_output, file_path, "ndjson")
+
+
+def write_binary(final_output, file_path):
+    _write_streamed(final_output, file_path, "binary")
+
+
+SERIALIZERS = {
+    "json": write_json,
+    "ndjson": write_ndjson,
+    "binary": write_binary,
+}
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _write_record(f, value):
+    """Writes one length-prefixed record; returns (payload offset, length)."""
+    payload = _dumps(value).encode("utf-8")
+    f.write(_RECORD_LENGTH.pack(len(payload)))
+    offset = f.tell()
+    f.write(payload)
+    return offset, len(payload)
+
+
+# ---------------- READERS ----------------
+
+class BinaryOutputReader:
+    """
+    Random access to a binary output file. Keep one open to serve many
+    lookups; only the trailer is read up front.
+
+        with BinaryOutputReader(path) as reader:
+            reader.section(41)          # 42nd section summary
+            reader.part("metadata")
+    """
+
+    def __init__(self, file_path):
+        self._file = open(file_path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{file_path} is not a binary compressed output")
+
+        self._file.seek(-_TRAILER.size, os.SEEK_END)
+        (self._section_index_offset, self._n_sections,
+         part_index_offset, part_index_length, magic) = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"{file_path} is truncated or corrupt")
+
+        self._parts = self._read(part_index_offset, part_index_length)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self._n_sections
+
+    def close(self):
+        self._file.close()
+
+    def section(self, index):
+        if not 0 <= index < self._n_sections:
+            raise IndexError(f"Section {index} out of range (0-{self._n_sections - 1})")
+        self._file.seek(self._section_index_offset + index * _INDEX_SLOT.size)
+        offset, length = _INDEX_SLOT.unpack(self._file.read(_INDEX_SLOT.size))
+        return self._read(offset, length)
+
+    def part(self, name):
+        return self._read(*self._parts[name])
+
+    def load(self):
+        """Rebuilds the full output dict."""
+        output = {name: self.part(name) for name in self._parts}
+        compressed = output["compressed_representation"]
+        sections = [self.section(i) for i in range(self._n_sections)]
+        output["compressed_representation"] = {"section_summaries": sections, **compressed}
+        return output
+
+    def _read(self, offset, length):
+        self._file.seek(offset)
+        return json.loads(self._file.read(length))
+
+
+def read_section(file_path, index):
+    """Loads one section summary from a binary output file."""
+    with BinaryOutputReader(file_path) as reader:
+        return reader.section(index)
+
+
+def load_final_output(file_path):
+    """Loads an output file written in any format, detected from its content."""
+    with open(file_path, "rb") as f:
+        head = f.read(len(MAGIC))
+
+    if head == MAGIC:
+        with BinaryOutputReader(file_path) as reader:
+            return reader.load()
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        try:
+            record = json.loads(first)
+        except ValueError:
+            record = None
+        if not (isinstance(record, dict) and "part" in record):
+            f.seek(0)
+            return json.load(f)
+
+        # Sections come first, as they were produced; the other parts follow
+        parts = {}
+        sections = []
+        while record is not None:
+            if record["part"] == "section":
+                sections.append(record["value"])
+            else:
+                parts[record["part"]] = record["value"]
+            line = f.readline()
+            record = json.loads(line) if line else None
+
+    parts["compressed_representation"] = {"section_summaries": sections, **parts["compressed_representation"]}
+    return parts
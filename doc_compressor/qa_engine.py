@@ -1,4 +1,7 @@
+import json
+import math
 import re
+from collections import Counter
 
 STOPWORDS = {
     "the", "is", "are", "was", "were", "be", "been", "being",
@@ -17,29 +20,123 @@ def score_chunk(chunk_text, question):
     c_words = set(tokenize(chunk_text))
     return len(q_words & c_words)
 
-def answer_question(question, summaries):
-    best_score = 0
-    best_idx = None
-    best_summary = None
 
-    for idx, summary in enumerate(summaries):
-        score = score_chunk(summary, question)
-        if score > best_score:
-            best_score = score
-            best_summary = summary
-            best_idx = idx
+class InvertedIndex:
+    """
+    Term -> postings index over a compressed document's summaries, ranked
+    with BM25. Each summary is tokenized once when added; questions only
+    touch the postings of their own terms.
+    """
 
-    if best_summary:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}      # term -> {doc_idx: term frequency}
+        self.doc_lengths = []
+        self.docs = []
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, texts):
+        """Indexes more summaries; doc indices continue from the current size."""
+        for text in texts:
+            doc_idx = len(self.docs)
+            tokens = tokenize(text)
+
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, {})[doc_idx] = tf
+
+            self.docs.append(text)
+            self.doc_lengths.append(len(tokens))
+
+    def search(self, question, top_k=5):
+        """
+        Returns up to top_k (doc_idx, bm25_score, matched_terms) tuples,
+        best first. Documents sharing no term with the question are skipped.
+        """
+        n_docs = len(self.docs)
+        if n_docs == 0:
+            return []
+
+        avg_len = sum(self.doc_lengths) / n_docs or 1.0
+        scores = {}
+        matched = {}
+
+        for term in set(tokenize(question)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_idx, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_idx] / avg_len)
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_idx] = matched.get(doc_idx, 0) + 1
+
+        ranked = sorted(scores, key=lambda d: (-scores[d], d))[:top_k]
+        return [(d, scores[d], matched[d]) for d in ranked]
+
+    # ---------- PERSISTENCE ----------
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "docs": self.docs,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings
+            }, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.docs = data["docs"]
+        index.doc_lengths = data["doc_lengths"]
+        # JSON object keys are strings; restore integer doc indices
+        index.postings = {
+            term: {int(d): tf for d, tf in postings.items()}
+            for term, postings in data["postings"].items()
+        }
+        return index
+
+
+def answer_question(question, summaries=None, index=None, top_k=3):
+    """
+    Answers from the best BM25 match. Pass a prebuilt `index` to reuse it
+    across questions; otherwise one is built from `summaries`.
+    """
+    if index is None:
+        index = InvertedIndex()
+        index.add(summaries or [])
+
+    hits = index.search(question, top_k=top_k)
+
+    if hits:
+        best_idx, _, best_matched = hits[0]
         return {
-            "answer": best_summary,
-            "why": f"Matched {best_score} key terms from the question",
+            "answer": index.docs[best_idx],
+            "why": f"Matched {best_matched} key terms from the question",
             "source_chunk": best_idx + 1,
-            "confidence": round(min(0.3 + best_score * 0.15, 0.9), 2)
+            "confidence": round(min(0.3 + best_matched * 0.15, 0.9), 2),
+            "matches": [
+                {
+                    "source_chunk": idx + 1,
+                    "answer": index.docs[idx],
+                    "score": round(score, 4)
+                }
+                for idx, score, _ in hits
+            ]
         }
 
     return {
         "answer": "Answer not found in the document.",
         "why": "No relevant keyword match",
         "source_chunk": None,
-        "confidence": 0.0
+        "confidence": 0.0,
+        "matches": []
     }
@@ -1,11 +1,15 @@
 import streamlit as st
 import base64
+import hashlib
+import io
 import os
 import sys
 import time
 import re
 from pypdf import PdfReader
 
+import telemetry
+
 # --- 1. DYNAMIC PATH INTEGRATION ---
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 DOC_COMPRESSOR_PATH = os.path.join(CURRENT_DIR, "doc_compressor")
@@ -14,25 +18,75 @@ sys.path.append(DOC_COMPRESSOR_PATH)
 # Importing modular logic for Track 4
 try:
     from cleaner import clean_text
-    from chunker import chunk_text
-    from compressor import compress_chunks
+    from chunker import CHUNKERS, DEFAULT_CHUNKER, iter_chunks
+    from compressor import compress_extractive
     from qa_engine import answer_question
     from loss_estimator import estimate_loss
+    from lru_cache import LRUCache
+    from hierarchy import compress_hierarchical
+    from chunk_cache import ChunkCache, compress_chunks_cached
 except ImportError:
     from doc_compressor.cleaner import clean_text
-    from doc_compressor.chunker import chunk_text
-    from doc_compressor.compressor import compress_chunks
+    from doc_compressor.chunker import CHUNKERS, DEFAULT_CHUNKER, iter_chunks
+    from doc_compressor.compressor import compress_extractive
     from doc_compressor.qa_engine import answer_question
     from doc_compressor.loss_estimator import estimate_loss
+    from doc_compressor.lru_cache import LRUCache
+    from doc_compressor.hierarchy import compress_hierarchical
+    from doc_compressor.chunk_cache import ChunkCache, compress_chunks_cached
+
+# Distinct documents whose extracted/cleaned/chunked form is kept across reruns
+DOCUMENT_CACHE_SIZE = 8
 
 # --- 2. DOCUMENT PROCESSING LOGIC ---
 
 def extract_content(uploaded_file):
     """Handles PDF and TXT extraction for Track 4 processing."""
+    data = uploaded_file.getvalue()
     if uploaded_file.name.endswith(".pdf"):
-        reader = PdfReader(uploaded_file)
-        return "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-    return uploaded_file.read().decode("utf-8")
+        reader = PdfReader(io.BytesIO(data))
+        page_texts = (page.extract_text() for page in reader.pages)
+        return "\n".join(text for text in page_texts if text)
+    return data.decode("utf-8")
+
+@st.cache_resource
+def get_document_cache():
+    # Survives Streamlit reruns; keyed by SHA-256 of the document content
+    return LRUCache(maxsize=DOCUMENT_CACHE_SIZE, name="documents")
+
+@st.cache_resource
+def get_chunk_cache():
+    # Chunk summaries keyed by chunk content hash, persisted between sessions
+    return ChunkCache()
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+def load_upload(uploaded_file):
+    """Extracts an upload once per distinct file content."""
+    key = content_key(uploaded_file.getvalue())
+    doc = get_document_cache().get(key)
+    if doc is None:
+        with telemetry.span("extract", file=uploaded_file.name):
+            doc = {"source_text": extract_content(uploaded_file)}
+        get_document_cache().put(key, doc)
+    return key, doc["source_text"]
+
+def prepare_document(doc_key, source_text, chunker=DEFAULT_CHUNKER):
+    """Returns (cleaned, chunks), reusing a cached result for the same content."""
+    cache = get_document_cache()
+    doc = cache.get(doc_key) or {"source_text": source_text}
+    if "cleaned" not in doc:
+        with telemetry.span("clean_text", chars=len(source_text)):
+            doc["cleaned"] = clean_text(source_text)
+    chunks_key = "chunks_" + chunker
+    if chunks_key not in doc:
+        with telemetry.span("chunk_text", chars=len(doc["cleaned"]), chunker=chunker) as span:
+            # Sentence-aligned chunks let an edited upload reuse most cached summaries
+            doc[chunks_key] = list(iter_chunks([doc["cleaned"]], chunker, chunk_size=300, overlap=50))
+            span.set(chunks=len(doc[chunks_key]))
+        cache.put(doc_key, doc)
+    return doc["cleaned"], doc[chunks_key]
 
 # --- 3. PAGE CONFIG & VISUAL THEME ---
 
@@ -94,14 +148,19 @@ with st.container():
     input_mode = st.radio("Compression Source:", ["Upload Document", "Paste Raw Context"], horizontal=True)
     
     source_text = ""
+    doc_key = None
     if input_mode == "Upload Document":
         file = st.file_uploader("Upload PDF or TXT Ground Truth", type=["pdf", "txt"])
-        if file: source_text = extract_content(file)
+        if file: doc_key, source_text = load_upload(file)
     else:
         source_text = st.text_area("Paste long-form context for compression:", height=200)
     
     st.markdown("---")
     test_query = st.text_input("Validation Query:", placeholder="Test the compressed context with a specific question...")
+    compression_mode = st.radio("Compression Mode:", ["Signal-Aware Rules", "Query-Aware Extractive", "Hierarchical Map-Reduce"], horizontal=True)
+    chunker = st.radio("Chunking:", CHUNKERS, index=CHUNKERS.index(DEFAULT_CHUNKER), horizontal=True,
+                       help="Sentence-aligned chunks, or fixed 300-character windows")
+    target_ratio = st.slider("Target Compression Ratio:", 0.05, 0.5, 0.2, 0.05) if compression_mode == "Query-Aware Extractive" else None
     st.markdown('</div>', unsafe_allow_html=True)
 
 # --- 5. TRACK 4 PIPELINE EXECUTION ---
@@ -113,20 +172,32 @@ if st.button("Execute Compression Cycle", use_container_width=True):
         start_time = time.time()
         with st.spinner("Analyzing context and preserving high-signal entities..."):
             
-            # A. Sanitization & Structuring
-            cleaned = clean_text(source_text)
-            chunks = chunk_text(cleaned, chunk_size=300, overlap=50)
+            # A. Sanitization & Structuring (cached per document content)
+            doc_key = doc_key or content_key(source_text.encode("utf-8"))
+            cleaned, chunks = prepare_document(doc_key, source_text, chunker)
             
             # B. Signal-Aware Compression
             # This triggers your rule-based logic for Risks, Security, and Personal Data.
-            compressed_data = compress_chunks(chunks)
+            with telemetry.span("compress", mode=compression_mode, chunks=len(chunks)):
+                if compression_mode == "Query-Aware Extractive":
+                    # Keeps the sentences most similar to the query, with source spans
+                    compressed_data = compress_extractive(cleaned, query=test_query, ratio=target_ratio)
+                elif compression_mode == "Hierarchical Map-Reduce":
+                    # Section-level summaries; every level is kept under "levels"
+                    compressed_data = compress_hierarchical(cleaned, chunk_size=300, overlap=50, chunker=chunker)
+                else:
+                    chunk_cache = get_chunk_cache()
+                    compressed_data = compress_chunks_cached(chunks, chunk_cache)
+                    chunk_cache.save()
             
             # C. Loss Estimation & Ratio Calculation
-            loss_report = estimate_loss(source_text, compressed_data)
+            with telemetry.span("estimate_loss"):
+                loss_report = estimate_loss(source_text, compressed_data)
             
             # D. Retrieval Validation
             summaries = [s["summary"] for s in compressed_data["section_summaries"]]
-            qa_res = answer_question(test_query, summaries) if test_query else None
+            with telemetry.span("answer_question"):
+                qa_res = answer_question(test_query, summaries) if test_query else None
             
             latency = round(time.time() - start_time, 2)
 
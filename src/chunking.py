@@ -1,12 +1,29 @@
 import json
 
-def chunk_documents(path, chunk_size=250, overlap=50):
+READ_BLOCK_CHARS = 1 << 20
+
+
+def iter_documents(path):
+    """
+    Yields documents one at a time from a JSON array file or a JSON Lines
+    file, without loading the whole file into memory.
+    """
     with open(path, "r", encoding="utf-8") as f:
-        docs = json.load(f)
+        first = _peek_non_space(f)
 
-    chunks = []
+        if first == "[":
+            yield from _iter_json_array(f)
+        elif first:
+            # JSON Lines: put the peeked char back in front of the first line
+            yield json.loads(first + f.readline())
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
 
-    for idx, doc in enumerate(docs):
+
+def iter_chunks(path, chunk_size=250, overlap=50):
+    """Lazily yields the same chunk dicts that chunk_documents returns."""
+    for idx, doc in enumerate(iter_documents(path)):
         # 🔒 SAFE doc_id handling (NO key error possible)
         doc_id = f"wiki_{idx+1}"
         text = doc.get("text", "")
@@ -22,13 +39,81 @@ def chunk_documents(path, chunk_size=250, overlap=50):
             end = start + chunk_size
             chunk_text = " ".join(words[start:end])
 
-            chunks.append({
+            yield {
                 "chunk_id": f"{doc_id}_chunk_{chunk_idx}",
                 "doc_id": doc_id,
                 "text": chunk_text
-            })
+            }
 
             start += chunk_size - overlap
             chunk_idx += 1
 
-    return chunks
+
+def chunk_documents(path, chunk_size=250, overlap=50):
+    return list(iter_chunks(path, chunk_size, overlap))
+
+
+def batched(iterable, size):
+    """Yields lists of up to `size` items, consuming `iterable` lazily."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------- STREAMING JSON HELPERS ----------------
+
+def _peek_non_space(f):
+    """Returns the first non-whitespace char and leaves f positioned after it."""
+    while True:
+        ch = f.read(1)
+        if not ch or not ch.isspace():
+            return ch
+
+
+def _iter_json_array(f):
+    # The opening "[" has already been consumed; decode one element at a
+    # time from a rolling buffer that only ever holds the current element
+    # plus one read block.
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    while True:
+        # Skip whitespace and element separators, reading more as needed
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer = f.read(READ_BLOCK_CHARS)
+            pos = 0
+            eof = not buffer
+
+        if pos >= len(buffer) or buffer[pos] == "]":
+            return
+
+        try:
+            doc, end = decoder.raw_decode(buffer, pos)
+            # A bare number at the buffer edge may continue in the next block
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+
+        if not complete:
+            # Grow geometrically so one huge element is not re-parsed per block
+            more = f.read(max(READ_BLOCK_CHARS, len(buffer) - pos))
+            eof = not more
+            buffer = buffer[pos:] + more
+            pos = 0
+            continue
+
+        yield doc
+        pos = end
@@ -0,0 +1,97 @@
+import math
+
+# Do not bother truncating a chunk into less room than this
+MIN_PARTIAL_TOKENS = 64
+
+# Shorter shared edges are treated as coincidence, not chunk overlap
+MIN_OVERLAP_WORDS = 8
+
+
+def estimate_tokens(text):
+    """Cheap tokenizer-free estimate (~4 characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def pack_context(chunks, token_budget=1500, min_score_ratio=0.5):
+    """
+    Fills a token budget from ranked retrieval results.
+
+    - chunks scoring below min_score_ratio x the best score are dropped
+    - text already packed from a neighbouring chunk of the same document
+      (chunk_documents overlaps chunks on purpose) is cut out
+    - whole chunks are added in rank order while they fit; the first one
+      that does not fit is truncated into the remaining room, if useful
+
+    Returns (packed_chunks, tokens_used). Packed chunks are shallow copies
+    whose "text" may be shortened.
+    """
+    if not chunks:
+        return [], 0
+
+    ranked = sorted(chunks, key=lambda c: c.get("score", 0.0), reverse=True)
+    best = ranked[0].get("score", 0.0)
+
+    packed = []
+    packed_words = {}     # doc_id -> list of word lists already in the context
+    used = 0
+
+    for chunk in ranked:
+        if best > 0 and chunk.get("score", 0.0) < best * min_score_ratio:
+            break
+
+        words = chunk["text"].split()
+        for other in packed_words.get(chunk.get("doc_id"), []):
+            words = _strip_overlap(words, other)
+            if not words:
+                break
+        if not words:
+            continue
+
+        text = " ".join(words)
+        tokens = estimate_tokens(text)
+        room = token_budget - used
+
+        if tokens > room:
+            if room < MIN_PARTIAL_TOKENS:
+                break
+            text = _truncate(words, room)
+            tokens = estimate_tokens(text)
+
+        packed.append(dict(chunk, text=text))
+        packed_words.setdefault(chunk.get("doc_id"), []).append(words)
+        used += tokens
+
+        if used >= token_budget:
+            break
+
+    return packed, used
+
+
+def _strip_overlap(words, other):
+    """Removes a prefix or suffix of `words` that duplicates an edge of `other`."""
+    if len(words) <= len(other) and f" {' '.join(words)} " in f" {' '.join(other)} ":
+        return []
+
+    limit = min(len(words), len(other))
+
+    # other ... | shared | words ...   (words continues other)
+    for k in range(limit, MIN_OVERLAP_WORDS - 1, -1):
+        if other[-k:] == words[:k]:
+            return words[k:]
+
+    # words ... | shared | other ...   (words precedes other)
+    for k in range(limit, MIN_OVERLAP_WORDS - 1, -1):
+        if words[-k:] == other[:k]:
+            return words[:-k]
+
+    return words
+
+
+def _truncate(words, token_budget):
+    max_chars = token_budget * 4
+    length = -1
+    for i, word in enumerate(words):
+        length += len(word) + 1
+        if length > max_chars:
+            return " ".join(words[:i])
+    return " ".join(words)
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import telemetry
+from chunking import batched
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, "outputs", "embedding_cache.sqlite")
+
+# Keeps each IN (...) list well under SQLite's bound-parameter limit
+_QUERY_BATCH = 500
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache in a local SQLite file, keyed by
+    (model name, text hash), so a paragraph is embedded once however many
+    documents, runs, or pipelines it turns up in.
+
+    Lookups and inserts are batched. Every hit refreshes the entry's last
+    use; beyond max_entries the least recently used rows are evicted.
+    Vectors are stored exactly as the model returned them (float32).
+
+    The row count is read once when the cache is opened and kept up to
+    date from then on, so inserts never scan the table. Rows added by
+    other processes sharing the file are only counted on the next open.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # One connection shared by the service's threads, guarded by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " used REAL NOT NULL,"
+                " PRIMARY KEY (model, hash))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, model, hashes):
+        """Returns {hash: vector} for the hashes that are cached."""
+        found = {}
+        now = time.time()
+
+        with self._lock, self._conn:
+            for batch in batched(hashes, _QUERY_BATCH):
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({marks})",
+                    [model, *batch],
+                ).fetchall()
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET used = ? WHERE model = ? AND hash IN ({marks})",
+                        [now, model, *batch],
+                    )
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+
+        return found
+
+    def put_many(self, model, items):
+        """Stores (hash, vector) pairs, then evicts down to max_entries."""
+        now = time.time()
+        rows = [
+            (model, h, np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+            for h, vector in items
+        ]
+
+        with self._lock, self._conn:
+            # A row already there holds the same text's vector; just refresh it
+            added = self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows).rowcount
+            if added < len(rows):
+                self._conn.executemany(
+                    "UPDATE embeddings SET vector = ?, used = ? WHERE model = ? AND hash = ?",
+                    [(vector, used, m, h) for m, h, vector, used in rows],
+                )
+            self._count += added
+
+            excess = self._count - self.max_entries
+            if excess > 0:
+                self._count -= self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY used LIMIT ?)",
+                    (excess,),
+                ).rowcount
+
+    def encode(self, model, texts, encode_fn):
+        """
+        Embeds texts, only passing cache misses to encode_fn.
+
+        Duplicate texts within the call are encoded once, and all misses go
+        to encode_fn in a single batch. Returns a float32 (len(texts), dim)
+        array in input order.
+        """
+        hashes = [content_hash(t) for t in texts]
+        found = self.get_many(model, set(hashes))
+
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = text
+
+        self.hits += len(found)
+        self.misses += len(missing)
+        telemetry.count("cache_hits_total", len(found), cache="embeddings")
+        telemetry.count("cache_misses_total", len(missing), cache="embeddings")
+
+        if missing:
+            vectors = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            fresh = list(zip(missing, vectors))
+            self.put_many(model, fresh)
+            found.update(fresh)
+
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[h] for h in hashes])
+
+
+class CachedEncoder:
+    """
+    Wraps any object with a SentenceTransformer-style encode() so repeated
+    texts are served from an EmbeddingCache. Usable wherever a model is
+    accepted, e.g. VectorStore(model=...) or on the doc_compressor side.
+    """
+
+    def __init__(self, model, model_name, cache=None):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, show_progress_bar=False, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        embeddings = self.cache.encode(
+            self.model_name,
+            list(texts),
+            lambda missing: self.model.encode(missing, show_progress_bar=show_progress_bar, **kwargs),
+        )
+        return embeddings[0] if single else embeddings
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+
+from llm_client import DEFAULT_MODEL, build_prompt
+
+# HTTP statuses worth retrying: rate limited or upstream temporarily down
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ---------------- TRANSPORTS ----------------
+# A transport is any object with `async generate(query, chunks) -> str`.
+
+class ClientTransport:
+    """Runs a (blocking) GeminiClient in worker threads."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def generate(self, query, chunks):
+        return await asyncio.to_thread(self.client.generate_answer, query, chunks)
+
+
+class HTTPTransport:
+    """
+    POSTs {"model", "prompt"} as JSON to `url` and reads back {"text"}.
+    Meant for local fake servers in tests and load experiments.
+    """
+
+    def __init__(self, url, model=DEFAULT_MODEL, timeout=30):
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+
+    async def generate(self, query, chunks):
+        prompt, _, _ = build_prompt(query, chunks)
+        body = json.dumps({"model": self.model, "prompt": prompt}).encode("utf-8")
+        return await asyncio.to_thread(self._post, body)
+
+    def _post(self, body):
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())["text"].strip()
+
+
+def is_transient(error):
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in TRANSIENT_STATUS
+    if isinstance(error, urllib.error.URLError):
+        return True
+
+    # google-genai APIError and most HTTP client errors carry a status code
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return status in TRANSIENT_STATUS
+
+
+# ---------------- BATCH RUNNER ----------------
+
+async def generate_batch(jobs, transport, concurrency=8, rate=None, max_retries=4, base_delay=0.5):
+    """
+    Runs (query, chunks) jobs with at most `concurrency` requests in flight
+    and, if `rate` is set, at most `rate` requests started per second.
+    Transient failures are retried with exponential backoff plus jitter.
+
+    Yields one result dict per job as soon as it finishes (not in input
+    order): {"index", "query", "answer", "error", "attempts"}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate) if rate else None
+
+    async def run(index, query, chunks):
+        async with semaphore:
+            attempt = 0
+            while True:
+                attempt += 1
+                if bucket:
+                    await bucket.acquire()
+                try:
+                    answer = await transport.generate(query, chunks)
+                    return {"index": index, "query": query, "answer": answer, "error": None, "attempts": attempt}
+                except Exception as e:
+                    if attempt > max_retries or not is_transient(e):
+                        return {"index": index, "query": query, "answer": None, "error": repr(e), "attempts": attempt}
+                    delay = base_delay * 2 ** (attempt - 1)
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+    tasks = [asyncio.ensure_future(run(i, q, c)) for i, (q, c) in enumerate(jobs)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
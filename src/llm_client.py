@@ -1,14 +1,58 @@
+import hashlib
 import os
 import sys
-from google import genai
+from pathlib import Path
 
 # Add the current directory to sys.path to ensure local imports work
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import telemetry
+
 from load_api_key import load_api_key
+from response_cache import ResponseCache
+from context_packer import estimate_tokens, pack_context
+
+DEFAULT_MODEL = "models/gemini-2.5-flash-lite"
+DEFAULT_CONTEXT_TOKENS = 1500
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "outputs" / "llm_cache"
+
+PROMPT_TEMPLATE = """
+Answer the question using ONLY the context below.
+If the context is insufficient, say so clearly.
+
+Context:
+{context}
+
+Question:
+{query}
+
+Return:
+- Final answer (3-4 lines)
+- Mention which evidence was used
+"""
+
 
 class GeminiClient:
-    def __init__(self):
+    def __init__(self, client=None, model=DEFAULT_MODEL, cache=None, context_tokens=DEFAULT_CONTEXT_TOKENS):
+        """
+        client: anything exposing models.generate_content(model=, contents=)
+            -> object with .text. Defaults to a real genai.Client; pass a
+            local stub to run without network access.
+        cache: a ResponseCache, or False to disable caching. Defaults to an
+            in-memory LRU backed by outputs/llm_cache on disk.
+        context_tokens: token budget for the packed retrieval context.
+        """
+        self.model = model
+        self.context_tokens = context_tokens
+
+        if cache is None:
+            cache = ResponseCache(cache_dir=str(DEFAULT_CACHE_DIR))
+        self.cache = cache or None
+
+        if client is not None:
+            self.client = client
+            return
+
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             try:
@@ -19,29 +63,63 @@ class GeminiClient:
         if not api_key:
             raise RuntimeError("GEMINI_API_KEY not set and could not be loaded from secrets file.")
 
+        from google import genai
         self.client = genai.Client(api_key=api_key)
 
     def generate_answer(self, query, chunks):
-        context = "\n\n".join(c["text"] for c in chunks[:3])
+        return self.generate(query, chunks)["answer"]
 
-        prompt = f"""
-Answer the question using ONLY the context below.
-If the context is insufficient, say so clearly.
+    def generate(self, query, chunks):
+        """
+        Like generate_answer, but also reports what went into the prompt:
+        {"answer", "context_tokens", "prompt_tokens", "chunk_ids"}.
+        """
+        prompt, context_chunks, context_tokens = build_prompt(query, chunks, self.context_tokens)
 
-Context:
-{context}
+        if self.cache is None:
+            answer = self._call(prompt)
+        else:
+            key = ResponseCache.make_key(
+                self.model, PROMPT_TEMPLATE, query, [_chunk_key(c) for c in context_chunks]
+            )
+            answer = self.cache.get_or_compute(key, lambda: self._call(prompt))
 
-Question:
-{query}
+        return {
+            "answer": answer,
+            "context_tokens": context_tokens,
+            "prompt_tokens": estimate_tokens(prompt),
+            "chunk_ids": [c.get("chunk_id") for c in context_chunks]
+        }
 
-Return:
-- Final answer (3-4 lines)
-- Mention which evidence was used
-"""
+    def generate_batch(self, jobs, **kwargs):
+        """
+        Async generator over many (query, chunks) jobs; see
+        llm_batch.generate_batch for the concurrency/rate/retry options.
+        Results go through this client, so they share its cache.
+        """
+        from llm_batch import ClientTransport, generate_batch
+        return generate_batch(jobs, ClientTransport(self), **kwargs)
 
-        response = self.client.models.generate_content(
-            model="models/gemini-2.5-flash-lite",
-            contents=prompt
-        )
+    def _call(self, prompt):
+        with telemetry.span("generate_content", metric="llm_call_seconds", model=self.model):
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt
+            )
+        telemetry.count("llm_calls_total", model=self.model)
 
         return response.text.strip()
+
+
+def build_prompt(query, chunks, context_tokens=DEFAULT_CONTEXT_TOKENS):
+    """Returns (prompt, packed context chunks, context tokens used)."""
+    context_chunks, used = pack_context(chunks, token_budget=context_tokens)
+    context = "\n\n".join(c["text"] for c in context_chunks)
+    return PROMPT_TEMPLATE.format(context=context, query=query), context_chunks, used
+
+
+def _chunk_key(chunk):
+    # The text hash keeps an edited chunk that kept its id from hitting a
+    # stale answer
+    text_hash = hashlib.sha1(chunk["text"].encode("utf-8")).hexdigest()[:16]
+    return f"{chunk.get('chunk_id', '')}:{text_hash}"
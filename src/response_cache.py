@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import telemetry
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM answers.
+
+    - memory: LRU dict holding up to max_entries answers
+    - disk:   one JSON file per key under cache_dir, expired after ttl_seconds
+
+    get_or_compute() also coalesces concurrent requests: if several threads
+    ask for the same key at once, only the first one calls upstream and the
+    others wait for its result.
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None, ttl_seconds=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()   # key -> (created, value)
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model, template, query, chunk_ids):
+        payload = json.dumps([model, template, query, list(chunk_ids)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    telemetry.count("cache_hits_total", cache="llm", tier="memory")
+                    return entry[1]
+                del self._memory[key]
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                telemetry.count("cache_misses_total", cache="llm")
+                return None
+            self.hits += 1
+            telemetry.count("cache_hits_total", cache="llm", tier="disk")
+            self._remember(key, entry)
+        return entry[1]
+
+    def put(self, key, value):
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # A leader may have finished between get() and here; its answer
+            # is in memory by the time it leaves _inflight
+            entry = self._memory.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                return entry[1]
+
+            waiter = self._inflight.get(key)
+            leader = waiter is None
+            if leader:
+                waiter = self._inflight[key] = {"event": threading.Event()}
+
+        if not leader:
+            waiter["event"].wait()
+            if "error" in waiter:
+                raise waiter["error"]
+            return waiter["value"]
+
+        try:
+            value = compute()
+            self.put(key, value)
+            waiter["value"] = value
+            return value
+        except Exception as e:
+            waiter["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            waiter["event"].set()
+
+    def evict_expired(self):
+        """Deletes expired entries from both tiers."""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (created, _) in self._memory.items() if now - created > self.ttl_seconds]:
+                del self._memory[key]
+
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                self._read_disk(name[:-5], now)
+
+    # ---------------- INTERNALS ----------------
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key, now):
+        if not self.cache_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if now - data["created"] > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        return data["created"], data["value"]
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"created": entry[0], "value": entry[1]}, f, ensure_ascii=False)
+        os.replace(tmp, path)
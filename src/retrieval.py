@@ -1,58 +1,154 @@
 import json
 import os
+import sys
 from pathlib import Path
-from chunking import chunk_documents
-from vector_store import VectorStore
+
+if __name__ == "__main__":
+    # Run as a script: make the repo-root telemetry module importable
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from chunking import iter_chunks
+import telemetry
 
 # ---------------- PATH SETUP ----------------
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 OUTPUT_DIR = BASE_DIR / "outputs"
+INDEX_DIR = OUTPUT_DIR / "index"
+
+
+def dedupe_results(results):
+    seen = set()
+    clean_results = []
+
+    for r in results:
+        if r["chunk_id"] not in seen:
+            seen.add(r["chunk_id"])
+            clean_results.append(r)
+
+    return clean_results
+
+
+class Retriever:
+    """
+    Library entry point for retrieval, in three explicit phases:
+
+        load()   open a previously saved index from disk (no model load)
+        index()  chunk the corpus and (re)build the index, reusing stored
+                 embeddings for unchanged chunks
+        query()  embed a question and return deduplicated top-k chunks
+
+    Importing this module is cheap: numpy and sentence_transformers are
+    only imported when load()/index() first create the VectorStore, and the
+    model itself is only loaded when something has to be encoded.
+    """
+
+    def __init__(self, data_path=None, index_dir=None, backend=None, model=None, model_name=None,
+                 embedding_cache=None):
+        self.data_path = str(data_path or DATA_DIR / "raw_cleaned.json")
+        self.index_dir = str(index_dir or INDEX_DIR)
+        # Set SEARCH_BACKEND=ivf for approximate search on very large corpora
+        self.backend = backend or os.getenv("SEARCH_BACKEND", "exact")
+        self.model = model
+        # Names `model` in the embedding cache and index; required with both
+        self.model_name = model_name
+        # Set EMBEDDING_CACHE=<sqlite path> to reuse embeddings across indexes and runs
+        if embedding_cache is None and os.getenv("EMBEDDING_CACHE"):
+            from embedding_cache import EmbeddingCache
+            embedding_cache = EmbeddingCache(os.getenv("EMBEDDING_CACHE"))
+        self.embedding_cache = embedding_cache
+        self.store = None
+
+    def __len__(self):
+        return len(self.store.metadata) if self.store else 0
+
+    def _get_store(self):
+        if self.store is None:
+            from vector_store import VectorStore
+            self.store = VectorStore(
+                index_dir=self.index_dir,
+                backend=self.backend,
+                model=self.model,
+                model_name=self.model_name,
+                embedding_cache=self.embedding_cache,
+            )
+        return self.store
+
+    def load(self):
+        """Loads the saved index; returns False if there is none yet."""
+        # index.json is written last, so it marks a complete index
+        if not os.path.exists(os.path.join(self.index_dir, "index.json")):
+            return False
+        self._get_store().load()
+        return True
+
+    def index(self, chunks=None):
+        """Builds the index from `chunks`, or streams them from data_path."""
+        if chunks is None:
+            chunks = iter_chunks(self.data_path)
+        with telemetry.span("build_index") as span:
+            self._get_store().build_index(chunks)
+            span.set(chunks=len(self.store.metadata))
+        return self
+
+    def query(self, query, top_k=5):
+        if not query:
+            raise ValueError("Query is empty!")
+        with telemetry.span("retrieve", top_k=top_k):
+            return dedupe_results(self.store.search(query, top_k=top_k))
+
+    def query_batch(self, queries, top_k=5):
+        return [dedupe_results(r) for r in self.store.search_batch(queries, top_k=top_k)]
+
+
+# ---------------- CLI HELPERS ----------------
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+def print_results(results):
+    print("\n=== TOP RETRIEVED CHUNKS ===\n")
 
-# ---------------- LOAD DOCUMENTS ----------------
-chunks = chunk_documents(str(DATA_DIR / "raw_cleaned.json"))
-print(f"[INFO] Total chunks created: {len(chunks)}")
+    for i, r in enumerate(results, 1):
+        preview = r["text"][:200].replace("\n", " ") + "..."
+        print(f"[{i}] Document  : {r['doc_id']}")
+        print(f"    Chunk ID : {r['chunk_id']}")
+        print(f"    Score    : {round(r['score'], 3)}")
+        print(f"    Preview  : {preview}")
+        print("-" * 60)
 
-# ---------------- BUILD VECTOR STORE ----------------
-store = VectorStore()
-store.build_index(chunks)
 
-# ---------------- READ QUERY ----------------
-with open(DATA_DIR / "query.txt", "r", encoding="utf-8") as f:
-    query = f.read().strip()
+def save_results(results, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
 
-if not query:
-    raise ValueError("Query file is empty!")
 
-# ---------------- RETRIEVE ----------------
-results = store.search(query, top_k=5)
+def main():
+    import argparse
 
-# ---------------- REMOVE DUPLICATES ----------------
-seen = set()
-clean_results = []
+    parser = argparse.ArgumentParser(description="Retrieve the top chunks for a query")
+    parser.add_argument("--query-file", default=str(DATA_DIR / "query.txt"))
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--cached", action="store_true",
+                        help="Use the saved index as-is instead of re-chunking the corpus")
+    args = parser.parse_args()
 
-for r in results:
-    if r["chunk_id"] not in seen:
-        seen.add(r["chunk_id"])
-        clean_results.append(r)
+    # ---------------- BUILD / LOAD INDEX ----------------
+    retriever = Retriever()
+    if not (args.cached and retriever.load()):
+        retriever.index()
+    print(f"[INFO] Total chunks indexed: {len(retriever)}")
 
-results = clean_results
+    # ---------------- READ QUERY ----------------
+    with open(args.query_file, "r", encoding="utf-8") as f:
+        query = f.read().strip()
 
-# ---------------- CLEAN CONSOLE OUTPUT ----------------
-print("\n=== TOP RETRIEVED CHUNKS ===\n")
+    # ---------------- RETRIEVE ----------------
+    results = retriever.query(query, top_k=args.top_k)
+    print_results(results)
 
-for i, r in enumerate(results, 1):
-    preview = r["text"][:200].replace("\n", " ") + "..."
-    print(f"[{i}] Document  : {r['doc_id']}")
-    print(f"    Chunk ID : {r['chunk_id']}")
-    print(f"    Score    : {round(r['score'], 3)}")
-    print(f"    Preview  : {preview}")
-    print("-" * 60)
+    # ---------------- SAVE JSON FOR ARYAN ----------------
+    save_results(results, str(OUTPUT_DIR / "retrieval_results.json"))
+    print("\n[INFO] Retrieval results saved to outputs/retrieval_results.json")
 
-# ---------------- SAVE JSON FOR ARYAN ----------------
-with open(OUTPUT_DIR / "retrieval_results.json", "w", encoding="utf-8") as f:
-    json.dump(results, f, indent=2, ensure_ascii=False)
 
-print("\n[INFO] Retrieval results saved to outputs/retrieval_results.json")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if __name__ == "__main__":
+    # Run as a script: make the repo-root telemetry module importable
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from retrieval import Retriever
+
+
+class RetrievalService:
+    """
+    Keeps one indexed Retriever warm so callers in the same process pay no
+    model or index startup cost per query.
+    """
+
+    def __init__(self, retriever=None, **retriever_kwargs):
+        # Not `retriever or ...`: an unindexed Retriever has len() 0 and is falsy
+        self.retriever = retriever if retriever is not None else Retriever(**retriever_kwargs)
+        if self.retriever.store is None:
+            self.retriever.index()
+
+    def __len__(self):
+        return len(self.retriever)
+
+    def query(self, query, top_k=5):
+        return self.retriever.query(query, top_k=top_k)
+
+    def query_batch(self, queries, top_k=5):
+        return self.retriever.query_batch(queries, top_k=top_k)
+
+
+# ---------------- LOCAL HTTP SERVER ----------------
+
+def make_server(service, host="127.0.0.1", port=8765):
+    """
+    Wraps a RetrievalService in a small JSON HTTP server:
+
+        POST /query  {"query": "...", "top_k": 5}       -> [results]
+        POST /query  {"queries": ["...", ...]}           -> [[results], ...]
+        GET  /health                                     -> {"chunks": N}
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/health":
+                return self._send(404, {"error": "not found"})
+            self._send(200, {"chunks": len(service)})
+
+        def do_POST(self):
+            if self.path != "/query":
+                return self._send(404, {"error": "not found"})
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("request body must be a JSON object")
+                top_k = int(body.get("top_k", 5))
+
+                if "queries" in body:
+                    queries = body["queries"]
+                    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                        raise ValueError("'queries' must be a list of strings")
+                    results = service.query_batch(queries, top_k=top_k)
+                else:
+                    query = body.get("query", "")
+                    if not isinstance(query, str):
+                        raise ValueError("'query' must be a string")
+                    results = service.query(query.strip(), top_k=top_k)
+            except (ValueError, TypeError) as e:
+                return self._send(400, {"error": str(e)})
+
+            self._send(200, results)
+
+        def _send(self, status, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve_in_background(service, host="127.0.0.1", port=8765):
+    server = make_server(service, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve retrieval queries over local HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    service = RetrievalService()
+    server = make_server(service, args.host, args.port)
+    print(f"[INFO] Retrieval service listening on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -1,39 +1,46 @@
 import json
-import subprocess
+import os
 import sys
+
+if __name__ == "__main__":
+    # Run as a script: make the repo-root telemetry module importable
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
 from llm_client import GeminiClient
 from explain import ExplainabilityModule
+from retrieval_service import RetrievalService
 
-RETRIEVAL_JSON = "outputs/retrieval_results.json"
 
+def answer_query(query, service, llm, explainer):
+    """Runs retrieval, generation and explainability for one question."""
+    retrieved_chunks = service.query(query, top_k=5)
 
-def main():
-    # ---------- RUN RETRIEVAL SCRIPT ----------
-    print("[INFO] Running retrieval step...")
-    subprocess.run(
-        [sys.executable, "src/retrieval.py"],
-        check=True
+    generation = llm.generate(query, retrieved_chunks)
+
+    report = explainer.generate_explainability_report(
+        query=query,
+        answer=generation["answer"],
+        retrieved_chunks=retrieved_chunks
     )
+    # What the packed prompt cost, next to the evidence it was built from
+    report["context_tokens"] = generation["context_tokens"]
+    report["prompt_tokens"] = generation["prompt_tokens"]
+    return report
+
 
-    # ---------- LOAD RETRIEVAL RESULTS ----------
-    with open(RETRIEVAL_JSON, "r", encoding="utf-8") as f:
-        retrieved_chunks = json.load(f)
+def main():
+    # ---------- LOAD RETRIEVAL SERVICE (model + index, once) ----------
+    print("[INFO] Loading retrieval service...")
+    service = RetrievalService()
 
     # ---------- QUERY ----------
     with open("data/query.txt") as f:
         query = f.read().strip()
 
-    # ---------- LLM ----------
+    # ---------- LLM + EXPLAINABILITY ----------
     llm = GeminiClient()
-    answer = llm.generate_answer(query, retrieved_chunks)
-
-    # ---------- EXPLAINABILITY ----------
     explainer = ExplainabilityModule()
-    report = explainer.generate_explainability_report(
-        query=query,
-        answer=answer,
-        retrieved_chunks=retrieved_chunks
-    )
+    report = answer_query(query, service, llm, explainer)
 
     print(json.dumps(report, indent=2))
     explainer.visualize_evidence()
@@ -41,6 +48,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
-
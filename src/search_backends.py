@@ -0,0 +1,219 @@
+import numpy as np
+
+# Rows scored per BLAS call when the matrix is stored as float16
+SCORE_BLOCK_ROWS = 65536
+
+# Upper bound on query x corpus score cells held at once by search_batch
+# (2**25 float32 cells = 128 MB)
+MAX_SCORE_CELLS = 2 ** 25
+
+# Backends expect L2-normalised rows and an L2-normalised query, so cosine
+# similarity is a plain dot product.
+
+
+class ExactSearch:
+    """Brute-force cosine scan over every embedding (the default backend)."""
+
+    def build(self, embeddings):
+        self.embeddings = embeddings
+
+    def search(self, query_emb, top_k=5):
+        scores = matvec(self.embeddings, query_emb)
+        top_indices = top_k_indices(scores, top_k)
+        return top_indices, scores[top_indices]
+
+    def search_batch(self, query_embs, top_k=5, batch_size=None):
+        """
+        Scores a block of queries with one matrix-matrix product per
+        batch_size queries. batch_size defaults to whatever keeps the score
+        block under MAX_SCORE_CELLS.
+        """
+        query_embs = np.asarray(query_embs, dtype=np.float32)
+        if batch_size is None:
+            batch_size = max(1, MAX_SCORE_CELLS // max(1, len(self.embeddings)))
+
+        all_indices, all_scores = [], []
+        for start in range(0, len(query_embs), batch_size):
+            scores = matmat(self.embeddings, query_embs[start:start + batch_size])
+            indices = top_k_rows(scores, top_k)
+            all_indices.append(indices)
+            all_scores.append(np.take_along_axis(scores, indices, axis=1))
+
+        if not all_indices:
+            return np.empty((0, 0), dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        return np.vstack(all_indices), np.vstack(all_scores)
+
+
+class IVFSearch:
+    """
+    Inverted-file index: k-means partitions the corpus into n_lists clusters
+    and a query only scans the n_probe clusters whose centroids are closest.
+
+    n_probe is the recall/latency knob: n_probe == n_lists is an exact scan,
+    smaller values scan roughly n_probe / n_lists of the corpus.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, n_iter=10, sample_size=50000, seed=42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.seed = seed
+
+    def build(self, embeddings):
+        vectors = embeddings
+        n = len(vectors)
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n) if n else 1
+
+        self.vectors = vectors
+        self.centroids = _train_kmeans(
+            vectors, n_lists, self.n_iter, self.sample_size, self.seed
+        )
+
+        # ---------- ASSIGN EVERY VECTOR TO ITS NEAREST CENTROID ----------
+        assignments = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 65536):
+            block = np.asarray(vectors[start:start + 65536], dtype=np.float32)
+            assignments[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=len(self.centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        self.list_ids = [order[offsets[i]:offsets[i + 1]] for i in range(len(self.centroids))]
+
+    def search(self, query_emb, top_k=5):
+        query = np.asarray(query_emb, dtype=np.float32)
+
+        n_probe = min(self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probe = top_k_indices(centroid_scores, n_probe)
+
+        candidates = np.concatenate([self.list_ids[c] for c in probe])
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+        top = top_k_indices(scores, top_k)
+        return candidates[top], scores[top]
+
+    def search_batch(self, query_embs, top_k=5, batch_size=None):
+        # Each query probes its own lists, so there is no shared matrix to
+        # batch against; returns per-query lists rather than a 2-D array.
+        all_indices, all_scores = [], []
+        for query_emb in query_embs:
+            indices, scores = self.search(query_emb, top_k)
+            all_indices.append(indices)
+            all_scores.append(scores)
+        return all_indices, all_scores
+
+
+BACKENDS = {
+    "exact": ExactSearch,
+    "ivf": IVFSearch,
+}
+
+
+def get_backend(backend):
+    """Accepts a backend name from BACKENDS or an already-built backend object."""
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown search backend: {backend!r}")
+        return BACKENDS[backend]()
+    return backend
+
+
+# ---------------- HELPERS ----------------
+
+def normalize(vectors):
+    """L2-normalises rows; zero rows are left as zeros."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def matvec(matrix, query):
+    """matrix @ query in float32, upcasting float16 storage block by block."""
+    query = np.asarray(query, dtype=np.float32)
+    if matrix.dtype == np.float32:
+        return matrix @ query
+
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+        scores[start:start + len(block)] = block @ query
+    return scores
+
+
+def matmat(matrix, queries):
+    """queries @ matrix.T in float32, shape (len(queries), len(matrix))."""
+    if matrix.dtype == np.float32:
+        return queries @ matrix.T
+
+    scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+        scores[:, start:start + len(block)] = queries @ block.T
+    return scores
+
+
+def top_k_indices(scores, k):
+    """Indices of the k highest scores, best first, via partial selection."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores, k):
+    """Row-wise top_k_indices for a 2-D score block."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+
+    picked = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-picked, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _train_kmeans(vectors, k, n_iter, sample_size, seed):
+    """Spherical k-means on a random sample of the corpus."""
+    rng = np.random.default_rng(seed)
+
+    if len(vectors) == 0:
+        return np.zeros((1, vectors.shape[1]), dtype=np.float32)
+
+    sample = vectors
+    if len(vectors) > sample_size:
+        sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    sample = np.asarray(sample, dtype=np.float32)
+
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=k)
+
+        # Re-seed empty clusters so no list is wasted
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = sample[rng.integers(len(sample), size=len(empty))]
+
+        centroids = normalize(sums)
+
+    return centroids.astype(np.float32)
@@ -1,33 +1,287 @@
+import hashlib
+import json
+import os
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from chunking import batched
+from search_backends import get_backend, normalize
+
+import telemetry
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+# Version, model and chunk hashes: all build_index needs to reuse vectors,
+# kept apart from the (much larger) chunk texts in METADATA_FILE
+INDEX_FILE = "index.json"
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Bumped whenever the on-disk layout changes (2 = L2-normalised rows,
+# 3 = hashes moved to INDEX_FILE)
+INDEX_VERSION = 3
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
 
 class VectorStore:
-    def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    def __init__(self, model_name=None, index_dir=None, backend="exact", dtype="float32", model=None,
+                 embedding_cache=None):
+        """
+        dtype sets the in-memory precision of the embedding matrix. The
+        on-disk index is always float32; "float16" halves resident memory at
+        the cost of a block-wise upcast during scoring.
+
+        The SentenceTransformer is only imported and loaded the first time
+        something needs to be encoded; pass `model` to supply any object with
+        a compatible encode() instead.
+
+        With an embedding_cache (embedding_cache.EmbeddingCache), chunk and
+        query texts already embedded under model_name - in any index or run -
+        are served from the cache and only misses reach the model. The cache
+        is keyed by model_name, so a supplied `model` needs one naming it.
+        """
+        if model is not None and embedding_cache is not None and model_name is None:
+            raise ValueError("model_name is required with model and embedding_cache: it keys the cached vectors")
+
+        self.model_name = model_name or DEFAULT_MODEL_NAME
+        self._model = model
+        self.embedding_cache = embedding_cache
+        self.index_dir = index_dir
+        self.backend = get_backend(backend)
+        self.dtype = np.dtype(dtype)
         self.embeddings = []
         self.metadata = []
+        self.hashes = []
+        self.metadata_digest = None
 
-    def build_index(self, chunks):
-        texts = [c["text"] for c in chunks]
-        self.embeddings = self.model.encode(texts, show_progress_bar=True)
-        self.metadata = chunks
+    @property
+    def model(self):
+        if self._model is None:
+            # Deferred: importing torch/sentence_transformers takes seconds
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
 
-    def search(self, query, top_k=5):
-        query_emb = self.model.encode(query)
+    def build_index(self, chunks, batch_size=1024):
+        """
+        Embeds chunks, reusing vectors from the on-disk index for any chunk
+        whose text hash is unchanged. Only new or edited chunks go through
+        the model; the refreshed index is written back to index_dir.
+
+        chunks may be any iterable (e.g. chunking.iter_chunks); it is consumed
+        in batches of batch_size so only one batch of texts is encoded at a
+        time.
+        """
+        cached_embeddings, cached_hashes, cached_digest = self._load_cached()
+        row_by_hash = {h: i for i, h in enumerate(cached_hashes)}
+
+        metadata, hashes, blocks = [], [], []
+        # Covers the fields besides the text (ids), which can change alone
+        digest = hashlib.sha1()
+        n_new = 0
+
+        for batch in batched(chunks, batch_size):
+            batch_hashes = [text_hash(c["text"]) for c in batch]
+            for c in batch:
+                fields = {k: v for k, v in c.items() if k != "text"}
+                digest.update(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            missing = [i for i, h in enumerate(batch_hashes) if h not in row_by_hash]
+
+            # Cached rows are copied out only once we know the corpus changed
+            new_embeddings = None
+            if missing:
+                new_embeddings = self._encode([batch[i]["text"] for i in missing])
+                n_new += len(missing)
+
+            blocks.append((batch_hashes, missing, new_embeddings))
+            metadata.extend(batch)
+            hashes.extend(batch_hashes)
+
+        telemetry.count("cache_hits_total", len(hashes) - n_new, cache="index_embeddings")
+        telemetry.count("cache_misses_total", n_new, cache="index_embeddings")
+        telemetry.count("chunks_indexed_total", len(hashes))
+
+        # ---------- UNCHANGED CORPUS: REUSE MEMMAP AS-IS ----------
+        if cached_hashes == hashes and len(hashes) > 0:
+            print(f"[INFO] Reusing on-disk index ({len(hashes)} chunks)")
+            self.embeddings = self._as_search_matrix(cached_embeddings)
+            self.metadata = metadata
+            self.hashes = hashes
+            self.metadata_digest = digest.hexdigest()
+            if self.index_dir and self.metadata_digest != cached_digest:
+                # Same texts, new ids: only the chunk records need rewriting
+                self._save_metadata(self.index_dir)
+            self.backend.build(self.embeddings)
+            return
+
+        print(f"[INFO] Embedded {n_new} new/changed chunks "
+              f"(reused {len(hashes) - n_new})")
+
+        if cached_embeddings is not None:
+            dim = cached_embeddings.shape[1]
+        elif n_new:
+            dim = next(b[2] for b in blocks if b[2] is not None).shape[1]
+        else:
+            dim = self.model.get_sentence_embedding_dimension()
+
+        embeddings = np.empty((len(hashes), dim), dtype=np.float32)
+        row = 0
+        for batch_hashes, missing, new_embeddings in blocks:
+            for i, h in enumerate(batch_hashes):
+                if h in row_by_hash:
+                    embeddings[row + i] = cached_embeddings[row_by_hash[h]]
+            if missing:
+                embeddings[[row + i for i in missing]] = new_embeddings
+            row += len(batch_hashes)
+
+        if cached_embeddings is not None:
+            # save() replaces the mapped file, which Windows refuses while
+            # it is still mapped
+            cached_embeddings._mmap.close()
+            del cached_embeddings
+
+        self.embeddings = embeddings
+        self.metadata = metadata
+        self.hashes = hashes
+        self.metadata_digest = digest.hexdigest()
+
+        if self.index_dir:
+            self.save(self.index_dir)
 
-        scores = np.dot(self.embeddings, query_emb) / (
-            np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query_emb)
+        self.embeddings = self._as_search_matrix(self.embeddings)
+        self.backend.build(self.embeddings)
+
+    # ---------------- PERSISTENCE ----------------
+
+    def save(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        emb_path = os.path.join(index_dir, EMBEDDINGS_FILE)
+
+        # Write to a temp file first so a crash never leaves a half-written index
+        tmp_emb = emb_path + ".tmp"
+        with open(tmp_emb, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        os.replace(tmp_emb, emb_path)
+
+        self._save_metadata(index_dir)
+
+        # Re-open as a memmap so the in-RAM copy can be released
+        self.embeddings = np.load(emb_path, mmap_mode="r")
+
+    def _save_metadata(self, index_dir):
+        """Writes METADATA_FILE, then INDEX_FILE, which marks the index as complete."""
+        _write_json(os.path.join(index_dir, METADATA_FILE), {"chunks": self.metadata})
+        _write_json(os.path.join(index_dir, INDEX_FILE), {
+            "version": INDEX_VERSION,
+            "model": self.model_name,
+            "dim": int(self.embeddings.shape[1]),
+            "metadata_digest": self.metadata_digest,
+            "hashes": self.hashes
+        })
+
+    def load(self, index_dir=None):
+        """Loads a saved index without touching the model."""
+        index_dir = index_dir or self.index_dir
+        with open(os.path.join(index_dir, METADATA_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+        self.embeddings = self._as_search_matrix(
+            np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
         )
+        self.metadata = meta["chunks"]
+        self.hashes = index["hashes"]
+        self.metadata_digest = index.get("metadata_digest")
+        self.backend.build(self.embeddings)
+
+    def _load_cached(self):
+        if not self.index_dir:
+            return None, [], None
+
+        # Only the hashes are read; the chunk texts in METADATA_FILE are not needed
+        emb_path = os.path.join(self.index_dir, EMBEDDINGS_FILE)
+        index_path = os.path.join(self.index_dir, INDEX_FILE)
+        if not (os.path.exists(emb_path) and os.path.exists(index_path)):
+            return None, [], None
+
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            embeddings = np.load(emb_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable index at {self.index_dir}: {e}")
+            return None, [], None
+
+        # Vectors from a different model or layout are not comparable
+        if (index.get("version") != INDEX_VERSION
+                or index.get("model") != self.model_name
+                or len(index.get("hashes", [])) != len(embeddings)):
+            return None, [], None
+
+        return embeddings, index["hashes"], index.get("metadata_digest")
+
+    def _encode(self, texts, show_progress_bar=False):
+        if self.embedding_cache is not None:
+            # The model is only loaded if some text is not cached
+            embeddings = self.embedding_cache.encode(
+                self.model_name, texts, lambda missing: self._model_encode(missing, show_progress_bar)
+            )
+        else:
+            embeddings = self._model_encode(texts, show_progress_bar)
+        return np.ascontiguousarray(normalize(np.asarray(embeddings, dtype=np.float32)))
+
+    def _model_encode(self, texts, show_progress_bar):
+        with telemetry.span("encode", metric="model_call_seconds", texts=len(texts)):
+            return self.model.encode(texts, show_progress_bar=show_progress_bar)
+
+    def _as_search_matrix(self, embeddings):
+        # float32 memmaps are used in place; float16 needs one in-RAM copy
+        if embeddings.dtype == self.dtype:
+            return embeddings
+        return np.ascontiguousarray(embeddings, dtype=self.dtype)
+
+    # ---------------- SEARCH ----------------
+
+    def search(self, query, top_k=5):
+        query_emb = self._encode([query])[0]
+
+        with telemetry.span("search", top_k=top_k):
+            top_indices, top_scores = self.backend.search(query_emb, top_k)
+
+        return [self._result(idx, score) for idx, score in zip(top_indices, top_scores)]
+
+    def search_batch(self, queries, top_k=5, batch_size=None):
+        """
+        Encodes all queries in one model call and scores them together.
+        batch_size caps how many queries are scored per matrix product, which
+        bounds peak memory at batch_size x corpus scores.
+        """
+        if not queries:
+            return []
+
+        query_embs = self._encode(list(queries))
+        with telemetry.span("search_batch", queries=len(query_embs), top_k=top_k):
+            all_indices, all_scores = self.backend.search_batch(query_embs, top_k, batch_size)
+
+        return [
+            [self._result(idx, score) for idx, score in zip(indices, scores)]
+            for indices, scores in zip(all_indices, all_scores)
+        ]
 
-        top_indices = scores.argsort()[-top_k:][::-1]
+    def _result(self, idx, score):
+        return {
+            "doc_id": self.metadata[idx]["doc_id"],
+            "chunk_id": self.metadata[idx]["chunk_id"],
+            "score": float(score),
+            "text": self.metadata[idx]["text"]
+        }
 
-        results = []
-        for idx in top_indices:
-            results.append({
-                "doc_id": self.metadata[idx]["doc_id"],
-                "chunk_id": self.metadata[idx]["chunk_id"],
-                "score": float(scores[idx]),
-                "text": self.metadata[idx]["text"]
-            })
 
-        return results
+def _write_json(path, value):
+    # Via a temp file, so a crash never leaves a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
@@ -0,0 +1,199 @@
+"""
+Lightweight tracing and metrics shared by the doc_compressor and src
+pipelines.
+
+Disabled by default: span() hands back one shared no-op object and count()
+and debug() return immediately, so instrumented code pays roughly one
+attribute check per call. Turn it on with PIPELINE_TELEMETRY=1 or enable().
+
+When enabled:
+- every span and debug event is written as one JSON line to the log sink
+  (stderr, or the file named by PIPELINE_TELEMETRY_LOG)
+- span durations and counters are aggregated in memory and can be
+  rendered in Prometheus text format, or served on /metrics
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_state = {"enabled": False, "sink": None}
+_lock = threading.Lock()
+
+# (metric name, sorted label items) -> value
+_counters = {}
+# (metric name, sorted label items) -> [count, sum_seconds]
+_timings = {}
+
+
+def enabled():
+    return _state["enabled"]
+
+
+def enable(log_path=None):
+    """Turns telemetry on; events go to log_path, or stderr if None."""
+    _state["sink"] = open(log_path, "a", encoding="utf-8") if log_path else sys.stderr
+    _state["enabled"] = True
+
+
+def disable():
+    _state["enabled"] = False
+    if _state["sink"] not in (None, sys.stderr):
+        _state["sink"].close()
+    _state["sink"] = None
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+
+
+# ---------------- RECORDING ----------------
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, name, metric, attrs):
+        self.name = name
+        self.metric = metric
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        labels = {"stage": self.name}
+
+        with _lock:
+            entry = _timings.setdefault(_key(self.metric, labels), [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+        event = {"span": self.name, "seconds": round(seconds, 6), **self.attrs}
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        _emit(event)
+        return False
+
+    def set(self, **attrs):
+        """Attaches attributes (byte counts, chunk counts, ...) to the span."""
+        self.attrs.update(attrs)
+
+
+def span(name, metric="stage_seconds", **attrs):
+    """
+    Times a block:
+
+        with telemetry.span("clean_text", bytes=len(text)) as s:
+            ...
+            s.set(chunks=len(chunks))
+    """
+    if not _state["enabled"]:
+        return _NOOP_SPAN
+    return _Span(name, metric, attrs)
+
+
+def count(name, value=1, **labels):
+    """Adds value to a counter, e.g. count("cache_hits_total", cache="llm")."""
+    if not _state["enabled"]:
+        return
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def debug(message, **fields):
+    """Structured replacement for ad-hoc debug prints."""
+    if not _state["enabled"]:
+        return
+    _emit({"debug": message, **fields})
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _emit(event):
+    sink = _state["sink"]
+    if sink is None:
+        return
+    event = {"ts": round(time.time(), 6), **event}
+    line = json.dumps(event, ensure_ascii=False, default=str)
+    with _lock:
+        sink.write(line + "\n")
+        sink.flush()
+
+
+# ---------------- EXPORT ----------------
+
+def render_prometheus():
+    """Current counters and span timings in Prometheus text format."""
+    lines = []
+
+    with _lock:
+        counters = sorted(_counters.items())
+        timings = sorted(_timings.items())
+
+    for (name, labels), value in counters:
+        lines.append(f"{name}{_labels(labels)} {value}")
+
+    for (name, labels), (n, total) in timings:
+        lines.append(f"{name}_count{_labels(labels)} {n}")
+        lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+
+    return "\n".join(lines) + "\n"
+
+
+def serve_metrics(host="127.0.0.1", port=9108):
+    """Serves render_prometheus() on /metrics from a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + inner + "}"
+
+
+if os.getenv("PIPELINE_TELEMETRY", "") not in ("", "0"):
+    enable(os.getenv("PIPELINE_TELEMETRY_LOG") or None)